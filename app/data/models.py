@@ -1,7 +1,9 @@
+from dataclasses import dataclass
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Tuple
 from datetime import datetime
 from enum import Enum
+import math
 
 
 class CreditRating(Enum):
@@ -35,24 +37,23 @@ class CreditRating(Enum):
         # Remove any whitespace and convert to uppercase
         rating = rating.strip().upper()
         
-        # Handle modifiers
-        rating = rating.replace('+', '_PLUS').replace('-', '_MINUS')
-        
         try:
-            return cls[rating]
+            return _RATING_BY_STRING[rating]
         except KeyError:
             raise ValueError(f"Invalid credit rating: {rating}")
 
     def display(self) -> str:
         """Return rating in standard format (e.g., 'AA+', 'BBB-')"""
-        name = self.name
-        return name.replace('_PLUS', '+').replace('_MINUS', '-')
+        return _RATING_DISPLAY[self]
 
     @staticmethod
     def from_score(score: float) -> 'CreditRating':
         """Convert a rating score back to a CreditRating enum"""
-        closest_rating = min(CreditRating, key=lambda x: abs(x.value - score))
-        return closest_rating
+        # Round to the closest score, halves going to the better rating, and clamp to AAA..D
+        if math.isnan(score):
+            return CreditRating.AAA
+        closest_score = min(max(math.ceil(score - 0.5), _MIN_RATING_SCORE), _MAX_RATING_SCORE)
+        return _RATING_BY_SCORE[closest_score]
 
     def is_investment_grade(self) -> bool:
         """Check if rating is investment grade (BBB- or better)"""
@@ -109,6 +110,20 @@ class CreditRating(Enum):
             return None
 
 
+# Conversion tables, built once so per-bond conversions are plain dict lookups
+_RATING_DISPLAY: Dict[CreditRating, str] = {
+    rating: rating.name.replace('_PLUS', '+').replace('_MINUS', '-') for rating in CreditRating
+}
+# Both enum names ('BBB_MINUS') and display forms ('BBB-') map to their rating
+_RATING_BY_STRING: Dict[str, CreditRating] = {
+    **{rating.name: rating for rating in CreditRating},
+    **{display: rating for rating, display in _RATING_DISPLAY.items()},
+}
+_RATING_BY_SCORE: Dict[int, CreditRating] = {rating.value: rating for rating in CreditRating}
+_MIN_RATING_SCORE = CreditRating.AAA.value
+_MAX_RATING_SCORE = CreditRating.D.value
+
+
 class RatingGrade(str, Enum):
     INVESTMENT_GRADE = "Investment Grade"
     HIGH_YIELD = "High Yield"
@@ -118,7 +133,8 @@ class RatingGrade(str, Enum):
         return RatingGrade.INVESTMENT_GRADE if rating.is_investment_grade() else RatingGrade.HIGH_YIELD
 
 
-class Bond(BaseModel):
+@dataclass(slots=True)
+class Bond:
     isin: str
     clean_price: float
     ytm: float
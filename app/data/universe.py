@@ -0,0 +1,129 @@
+"""Columnar (struct-of-arrays) view of a bond universe"""
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.data.models import Bond
+
+
+@dataclass
+class BondTable:
+    """Bond attributes stored as parallel NumPy arrays, row-aligned with `bonds`"""
+    bonds: List[Bond]
+    isin: np.ndarray
+    clean_price: np.ndarray
+    ytm: np.ndarray
+    modified_duration: np.ndarray
+    maturity_date: np.ndarray  # datetime64[ns]
+    maturity_year: np.ndarray
+    coupon_rate: np.ndarray
+    coupon_frequency: np.ndarray
+    rating: np.ndarray  # Display form, e.g. 'BBB-'
+    rating_score: np.ndarray
+    min_piece: np.ndarray
+    increment_size: np.ndarray
+    currency: np.ndarray
+    issuer: np.ndarray
+    country: np.ndarray
+    sector: np.ndarray
+    payment_rank: np.ndarray
+    # Integer codes per category column and the code of each distinct value
+    _codes: Dict[str, Tuple[np.ndarray, Dict[Any, int]]] = field(init=False, repr=False)
+    # Rows sorted by code per category column and where each code's rows start, built on first use
+    _rows: Dict[str, Tuple[np.ndarray, np.ndarray]] = field(init=False, repr=False)
+
+    # Columns that can be used in range filters and exclusion conditions
+    NUMERIC_COLUMNS = ('clean_price', 'ytm', 'modified_duration', 'maturity_year', 'maturity_ns', 'coupon_rate',
+                       'coupon_frequency', 'rating_score', 'min_piece', 'increment_size')
+    CATEGORY_COLUMNS = ('isin', 'rating', 'currency', 'issuer', 'country', 'sector', 'payment_rank')
+    # Columns whose bounds and distinct values are listed in the facets
+    RANGE_FACET_COLUMNS = ('ytm', 'modified_duration', 'maturity_year')
+    VALUE_FACET_COLUMNS = ('rating', 'issuer', 'country', 'sector', 'payment_rank')
+    # Code of values that do not occur in a column (missing values are coded -1)
+    ABSENT_CODE = -2
+
+    def __post_init__(self):
+        self._codes = {}
+        self._rows = {}
+        for name in self.CATEGORY_COLUMNS:
+            codes, uniques = pd.factorize(getattr(self, name), use_na_sentinel=True)
+            self._codes[name] = (codes.astype(np.int32), {value: code for code, value in enumerate(uniques)})
+
+    def __len__(self) -> int:
+        return len(self.bonds)
+
+    @classmethod
+    def from_bonds(cls, bonds: List[Bond]) -> 'BondTable':
+        """Build the columnar view of a list of bonds"""
+        maturity_date = np.array([bond.maturity_date for bond in bonds], dtype='datetime64[ns]')
+        return cls(
+            bonds=bonds,
+            isin=np.array([bond.isin for bond in bonds], dtype=object),
+            clean_price=np.array([bond.clean_price for bond in bonds], dtype=np.float64),
+            ytm=np.array([bond.ytm for bond in bonds], dtype=np.float64),
+            modified_duration=np.array([bond.modified_duration for bond in bonds], dtype=np.float64),
+            maturity_date=maturity_date,
+            maturity_year=maturity_date.astype('datetime64[Y]').astype(np.int64) + 1970,
+            coupon_rate=np.array([bond.coupon_rate for bond in bonds], dtype=np.float64),
+            coupon_frequency=np.array([bond.coupon_frequency for bond in bonds], dtype=np.int64),
+            rating=np.array([bond.credit_rating.display() for bond in bonds], dtype=object),
+            rating_score=np.array([bond.credit_rating.value for bond in bonds], dtype=np.int64),
+            min_piece=np.array([bond.min_piece for bond in bonds], dtype=np.float64),
+            increment_size=np.array([bond.increment_size for bond in bonds], dtype=np.float64),
+            currency=np.array([bond.currency for bond in bonds], dtype=object),
+            issuer=np.array([bond.issuer for bond in bonds], dtype=object),
+            country=np.array([bond.country for bond in bonds], dtype=object),
+            sector=np.array([bond.sector for bond in bonds], dtype=object),
+            payment_rank=np.array([bond.payment_rank for bond in bonds], dtype=object),
+        )
+
+    @property
+    def maturity_ns(self) -> np.ndarray:
+        """Maturity dates as int64 nanoseconds since the epoch"""
+        return self.maturity_date.view(np.int64)
+
+    @cached_property
+    def facets(self) -> Dict[str, Any]:
+        """Bounds of the range facet columns and sorted distinct values of the value facet columns"""
+        # Bounds are cast back to Python numbers so range filters built from them stay JSON serializable
+        facets: Dict[str, Any] = {
+            name: (getattr(self, name).min().item(), getattr(self, name).max().item())
+            for name in self.RANGE_FACET_COLUMNS
+        }
+        # Value lists are tuples, since the table and its facets are shared across sessions
+        facets['values'] = {
+            name: tuple(sorted(pd.unique(getattr(self, name)).tolist()))
+            for name in self.VALUE_FACET_COLUMNS
+        }
+        return facets
+
+    def numeric_column(self, name: str) -> Optional[np.ndarray]:
+        """Get a numeric column by field name, or None if it is not numeric"""
+        return getattr(self, name) if name in self.NUMERIC_COLUMNS else None
+
+    def category_column(self, name: str) -> Optional[np.ndarray]:
+        """Get a categorical column by field name, or None if it is not categorical"""
+        return getattr(self, name) if name in self.CATEGORY_COLUMNS else None
+
+    def category_codes(self, name: str) -> Optional[np.ndarray]:
+        """Get the integer codes of a categorical column, or None if it is not categorical"""
+        return self._codes[name][0] if name in self.CATEGORY_COLUMNS else None
+
+    def category_code(self, name: str, value: Any) -> int:
+        """Get the code of a value in a categorical column, ABSENT_CODE if it never occurs"""
+        return self._codes[name][1].get(value, self.ABSENT_CODE)
+
+    def category_rows(self, name: str, value: Any) -> np.ndarray:
+        """Get the ascending row positions holding a value of a categorical column"""
+        rows = self._rows.get(name)
+        if rows is None:
+            codes, code_by_value = self._codes[name]
+            # A stable sort keeps the rows of each code ascending; missing values (-1) sort first
+            order = np.argsort(codes, kind='stable')
+            starts = np.searchsorted(codes[order], np.arange(len(code_by_value) + 1))
+            rows = self._rows[name] = (order, starts)
+        code = self.category_code(name, value)
+        if code < 0:
+            return rows[0][:0]
+        return rows[0][rows[1][code]:rows[1][code + 1]]
@@ -1,9 +1,62 @@
 """Filter management module"""
+import copy
 import json
+import math
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union, Callable
+import numpy as np
 import pandas as pd
 from app.data.models import Bond
+from app.data.universe import BondTable
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library is used without it
+    orjson = None
+
+
+def _read_json(path: Path) -> Any:
+    """Read a JSON file, with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Write a JSON file, with orjson when available"""
+    if orjson is not None:
+        # orjson only supports a two-space indent; the json fallback keeps the original four.
+        # NumPy scalars, e.g. bounds taken from the facets, are written as numbers like json does.
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4)
+
+
+@lru_cache(maxsize=8)
+def _read_json_cached(path: str, mtime_ns: int) -> Any:
+    """Read a JSON file once per modification time"""
+    return _read_json(Path(path))
+
+
+def _year_start_ns(year: int) -> int:
+    """Get January 1st of a year as nanoseconds since the epoch, clamped to the datetime64[ns] range"""
+    # Years outside the range map just past its ends, so a bound there keeps every date on one side
+    if year <= pd.Timestamp.min.year:
+        return pd.Timestamp.min.value
+    if year > pd.Timestamp.max.year:
+        return pd.Timestamp.max.value + 1
+    return pd.Timestamp(year=year, month=1, day=1).value
+
+
+# A compiled filter step ANDs its predicate into the mask, using scratch as a work buffer
+FilterStep = Callable[[BondTable, np.ndarray, np.ndarray], None]
+
+# Number of universes whose columnar view is kept, so sessions with different uploads do not evict each other
+MAX_CACHED_TABLES = 8
 
 class FilterManager:
     """Manages universe filters"""
@@ -11,89 +64,191 @@ class FilterManager:
         self.filters_path = Path(__file__).parent.parent.parent / "data" / "filters"
         self.filters_file = self.filters_path / "filters.json"
         self.last_used_file = self.filters_path / "last_used.json"
+        # The manager is shared by every session, so the filters and the table cache are only
+        # touched under this lock. It is reentrant because saving recompiles while holding it.
+        self._lock = threading.RLock()
+        self._filters_mtime_ns: Optional[int] = None
         self._predefined_filters = self._load_predefined_filters()
+        self._compiled_filters: Dict[str, List[FilterStep]] = {}
+        self._compile_predefined_filters()
+        # Columnar view per universe, keyed by id(universe)
+        self._table_cache: Dict[int, Tuple[List[Bond], BondTable]] = {}
         
+    def _get_filters_mtime(self) -> Optional[int]:
+        """Get the modification time of the filters file, or None if it does not exist"""
+        try:
+            return self.filters_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
     def _load_predefined_filters(self) -> Dict[str, Dict[str, Any]]:
         """Load predefined filters from JSON file"""
-        if not self.filters_file.exists():
+        self._filters_mtime_ns = self._get_filters_mtime()
+        if self._filters_mtime_ns is None:
             return {}
-        with open(self.filters_file, 'r') as f:
-            return json.load(f)
+        # The parsed file is cached until it changes, so reloading it is cheap.
+        # The copy keeps adding or removing filters from touching the cached dict.
+        return dict(_read_json_cached(str(self.filters_file), self._filters_mtime_ns))
+    
+    def _refresh_predefined_filters(self) -> None:
+        """Reload the predefined filters if the file was changed outside this manager"""
+        if self._get_filters_mtime() != self._filters_mtime_ns:
+            self._predefined_filters = self._load_predefined_filters()
+            self._compile_predefined_filters()
+    
+    def _compile_predefined_filters(self) -> None:
+        """Compile every predefined filter once, so applying it skips parsing the config"""
+        # Both dicts are replaced rather than updated, so a caller holding the old ones is unaffected
+        self._compiled_filters = {
+            name: self._get_compiled_filter(entry['filters'])
+            for name, entry in self._predefined_filters.items()
+            if entry.get('filters')
+        }
+        self._predefined_descriptions = {k: v['description'] for k, v in self._predefined_filters.items()}
     
     def get_predefined_filters(self) -> Dict[str, str]:
         """Get list of predefined filters with descriptions"""
-        return {k: v['description'] for k, v in self._predefined_filters.items()}
+        with self._lock:
+            self._refresh_predefined_filters()
+            # A copy, so a session changing it cannot affect the others
+            return dict(self._predefined_descriptions)
     
-    def apply_filter(self, universe: List[Bond], filter_config: Dict[str, Any]) -> List[Bond]:
-        """Apply filter configuration to universe"""
-        if not filter_config:
-            return universe
+    def get_predefined_filter_config(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a predefined filter's configuration, or None if it does not exist"""
+        with self._lock:
+            self._refresh_predefined_filters()
+            entry = self._predefined_filters.get(name)
+            return copy.deepcopy(entry['filters']) if entry else None
+    
+    def _universe_to_table(self, universe: List[Bond]) -> BondTable:
+        """Get the columnar view of a universe, building it only once per universe"""
+        with self._lock:
+            cached = self._table_cache.get(id(universe))
+            # Keep a reference to the universe so a recycled id cannot return a stale table
+            if cached is None or cached[0] is not universe:
+                if len(self._table_cache) >= MAX_CACHED_TABLES:
+                    # Evict the oldest universe
+                    del self._table_cache[next(iter(self._table_cache))]
+                cached = self._table_cache[id(universe)] = (universe, BondTable.from_bonds(universe))
+            return cached[1]
 
-        df = pd.DataFrame([bond.__dict__ for bond in universe])
+    @staticmethod
+    def _compile_filter(filter_config: Dict[str, Any]) -> List[FilterStep]:
+        """Turn a filter configuration into steps that AND their predicate into a mask"""
+        steps: List[FilterStep] = []
         
-        # Apply range filters
-        range_filters = filter_config.get('range_filters', {})
-        for field, range_values in range_filters.items():
+        # Range filters
+        for field, range_values in filter_config.get('range_filters', {}).items():
+            if field not in BondTable.NUMERIC_COLUMNS:
+                continue
+            min_val = range_values.get('min')
+            max_val = range_values.get('max')
+            
+            # maturity_year compares whole years, so bonds maturing in the max year are included.
+            # The years are turned into nanosecond bounds once, so the mask compares plain int64.
             if field == 'maturity_year':
-                # Special handling for maturity year to include full years
-                min_val = range_values.get('min')
-                max_val = range_values.get('max')
+                field = 'maturity_ns'
                 if min_val is not None:
-                    df = df[df['maturity_date'].dt.year >= min_val]
+                    min_val = _year_start_ns(math.ceil(min_val))
                 if max_val is not None:
-                    # Include bonds maturing up to the end of the max year
-                    df = df[df['maturity_date'].dt.year <= max_val]
-            elif field in df.columns:
-                min_val = range_values.get('min')
-                max_val = range_values.get('max')
+                    max_val = _year_start_ns(math.floor(max_val) + 1) - 1
+            
+            def range_step(table: BondTable, mask: np.ndarray, scratch: np.ndarray,
+                           field: str = field, min_val: Optional[float] = min_val,
+                           max_val: Optional[float] = max_val) -> None:
+                values = table.numeric_column(field)
                 if min_val is not None:
-                    df = df[df[field] >= min_val]
+                    np.greater_equal(values, min_val, out=scratch)
+                    mask &= scratch
                 if max_val is not None:
-                    df = df[df[field] <= max_val]
+                    np.less_equal(values, max_val, out=scratch)
+                    mask &= scratch
+            
+            steps.append(range_step)
         
-        # Apply exclusion groups if present
+        # Exclusion groups
         if 'exclusion_groups' in filter_config:
-            group_masks = []
-            for group in filter_config['exclusion_groups']:
-                # Start with all True for this group
-                group_mask = pd.Series([True] * len(df))
-                # Apply all conditions in the group (AND logic)
-                for condition in group['conditions']:
-                    field = condition['category']
-                    value = condition['value']
-                    if field in df.columns:
-                        group_mask &= (df[field] == value)
-                group_masks.append(group_mask)
+            groups = [
+                [(condition['category'], condition['value']) for condition in group['conditions']
+                 if condition['category'] in BondTable.CATEGORY_COLUMNS]
+                for group in filter_config['exclusion_groups']
+            ]
             
-            # Combine all group masks with OR logic and invert (we want to exclude matches)
-            if group_masks:
-                exclude_mask = pd.concat(group_masks, axis=1).any(axis=1)
-                df = df[~exclude_mask]
+            def exclusion_step(table: BondTable, mask: np.ndarray, scratch: np.ndarray,
+                               groups: List[List[Tuple[str, Any]]] = groups) -> None:
+                for conditions in groups:
+                    # A group without conditions matches every bond
+                    if not conditions:
+                        mask[:] = False
+                        return
+                    # Intersect the rows holding each condition's value (AND logic), so only
+                    # the matching rows are touched rather than whole columns
+                    rows = None
+                    for category, value in conditions:
+                        value_rows = table.category_rows(category, value)
+                        rows = value_rows if rows is None else np.intersect1d(rows, value_rows, assume_unique=True)
+                    # Matches of any group are excluded
+                    mask[rows] = False
+            
+            steps.append(exclusion_step)
+        
+        return steps
+    
+    @classmethod
+    def _get_compiled_filter(cls, filter_config: Dict[str, Any]) -> List[FilterStep]:
+        """Get the compiled steps of a filter configuration, reusing them for identical configurations"""
+        try:
+            config_key = json.dumps(filter_config, sort_keys=True)
+        except TypeError:
+            # Configurations that cannot be serialized are compiled every time
+            return cls._compile_filter(filter_config)
+        return _compile_filter_key(config_key)
+    
+    def _run_filter(self, universe: List[Bond], steps: List[FilterStep],
+                    table: Optional[BondTable] = None) -> List[Bond]:
+        """Run compiled filter steps over a universe"""
+        if table is None:
+            table = self._universe_to_table(universe)
+        mask = np.ones(len(table), dtype=bool)
+        # Comparisons are written into one scratch buffer and ANDed in place,
+        # so no temporary array is allocated per predicate
+        scratch = np.empty(len(table), dtype=bool)
+        for step in steps:
+            step(table, mask, scratch)
         
         # Convert back to list of Bond objects
-        filtered_isins = df['isin'].tolist()
-        return [bond for bond in universe if bond.isin in filtered_isins]
+        return [table.bonds[i] for i in np.flatnonzero(mask)]
+    
+    def apply_filter(self, universe: List[Bond], filter_config: Dict[str, Any],
+                     table: Optional[BondTable] = None) -> List[Bond]:
+        """Apply filter configuration to universe
+        
+        If the caller already holds the BondTable of the universe (built at load
+        time), passing it avoids rebuilding the columns from the bond objects.
+        """
+        if not filter_config:
+            return universe
+        return self._run_filter(universe, self._get_compiled_filter(filter_config), table)
     
     def apply_predefined_filter(self, universe: List[Bond], filter_name: str) -> List[Bond]:
         """Apply a predefined filter to the universe"""
-        if filter_name not in self._predefined_filters:
+        with self._lock:
+            self._refresh_predefined_filters()
+            steps = self._compiled_filters.get(filter_name)
+        if steps is None:
             return universe
-        
-        filter_config = self._predefined_filters[filter_name]['filters']
-        return self.apply_filter(universe, filter_config)
+        return self._run_filter(universe, steps)
     
     def save_last_used(self, filter_config: Dict[str, Any]) -> None:
         """Save last used filter configuration"""
-        with open(self.last_used_file, 'w') as f:
-            json.dump(filter_config, f, indent=2)
+        _write_json(self.last_used_file, filter_config)
     
     def load_last_used(self) -> Optional[Dict[str, Any]]:
         """Load last used filter configuration"""
         if not self.last_used_file.exists():
             return None
         try:
-            with open(self.last_used_file, 'r') as f:
-                return json.load(f)
+            return _read_json(self.last_used_file)
         except:
             return None
     
@@ -101,55 +256,23 @@ class FilterManager:
         """Save a new predefined filter"""
         if not name or not description:
             return False
-            
-        # Format the filter entry
-        filter_entry = {
-            "description": description,
-            "filters": filter_config
-        }
-        
-        # Load existing filters
-        try:
-            with open(self.filters_file, 'r') as f:
-                filters = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            filters = {}
-            
-        # Add new filter
-        filters[name] = filter_entry
-        
-        # Save back to file
-        try:
-            with open(self.filters_file, 'w') as f:
-                json.dump(filters, f, indent=4)
-            return True
-        except Exception:
-            return False
+        return self.save_filter(name, description, filter_config)
     
     def delete_predefined_filter(self, filter_name: str) -> bool:
         """Delete a predefined filter"""
-        try:
-            with open(self.filters_file, 'r') as f:
-                filters = json.load(f)
-                
-            if filter_name in filters:
-                del filters[filter_name]
-                
-                with open(self.filters_file, 'w') as f:
-                    json.dump(filters, f, indent=4)
-                return True
-            return False
-        except Exception:
-            return False
+        return self.delete_filter(filter_name)
 
     def save_filter(self, name: str, description: str, filters: Dict[str, Any]) -> bool:
         """Save a new filter or update existing one"""
         try:
-            self._predefined_filters[name] = {
-                "description": description,
-                "filters": filters
-            }
-            self.save_predefined_filters()
+            with self._lock:
+                self._refresh_predefined_filters()
+                # Store a copy, the session keeps editing its active filters in place
+                self._predefined_filters[name] = {
+                    "description": description,
+                    "filters": copy.deepcopy(filters)
+                }
+                self.save_predefined_filters()
             return True
         except Exception as e:
             print(f"Error saving filter: {e}")
@@ -158,10 +281,12 @@ class FilterManager:
     def delete_filter(self, name: str) -> bool:
         """Delete a filter by name"""
         try:
-            if name in self._predefined_filters:
-                del self._predefined_filters[name]
-                self.save_predefined_filters()
-                return True
+            with self._lock:
+                self._refresh_predefined_filters()
+                if name in self._predefined_filters:
+                    del self._predefined_filters[name]
+                    self.save_predefined_filters()
+                    return True
             return False
         except Exception as e:
             print(f"Error deleting filter: {e}")
@@ -169,24 +294,35 @@ class FilterManager:
 
     def save_predefined_filters(self):
         """Save predefined filters to JSON file"""
-        # Ensure directory exists
-        self.filters_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.filters_file, "w") as f:
-            json.dump(self._predefined_filters, f, indent=4)
+        with self._lock:
+            self._compile_predefined_filters()
+            # Ensure directory exists
+            self.filters_file.parent.mkdir(parents=True, exist_ok=True)
+            _write_json(self.filters_file, self._predefined_filters)
+            # The file now matches the filters in memory, so it needs no reload
+            self._filters_mtime_ns = self._get_filters_mtime()
 
     def update_filter(self, name: str, filters: dict) -> bool:
         """Update an existing filter while preserving its description"""
         try:
-            if name in self._predefined_filters:
-                # Preserve the original description
-                description = self._predefined_filters[name]["description"]
-                self._predefined_filters[name] = {
-                    "description": description,
-                    "filters": filters
-                }
-                self.save_predefined_filters()
-                return True
+            with self._lock:
+                self._refresh_predefined_filters()
+                if name in self._predefined_filters:
+                    # Preserve the original description
+                    description = self._predefined_filters[name]["description"]
+                    self._predefined_filters[name] = {
+                        "description": description,
+                        "filters": copy.deepcopy(filters)
+                    }
+                    self.save_predefined_filters()
+                    return True
             return False
         except Exception as e:
             print(f"Error updating filter: {e}")
             return False
+
+
+@lru_cache(maxsize=64)
+def _compile_filter_key(config_key: str) -> List[FilterStep]:
+    """Compile a filter configuration from its JSON key, cached across FilterManager instances"""
+    return FilterManager._compile_filter(json.loads(config_key))
@@ -1,27 +1,32 @@
 """Main application entry point"""
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
 from pathlib import Path
 import logging
 from dotenv import load_dotenv
+import io
 import os
 import sys
+from typing import List, Optional
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 # Add the app directory to Python path
 app_dir = Path(__file__).parent.parent
 sys.path.append(str(app_dir))
 
-from app.data.models import Bond, PortfolioConstraints, CreditRating
-from app.optimization.engine import PortfolioOptimizer
+from app.data.models import Bond, PortfolioConstraints, CreditRating, OptimizationResult
+from app.data.universe import BondTable
 from app.ui.components import (
     render_constraints_form,
     display_optimization_results,
     render_main_constraints_form,
-    render_optional_constraints
+    render_optional_constraints,
+    limit_categories,
+    get_bond_index
 )
 from app.ui.filter_components import render_filter_controls
 from app.filters import FilterManager
@@ -33,70 +38,169 @@ logger = setup_logging()
 # Load environment variables
 load_dotenv()
 
-def load_bond_universe(uploaded_file: UploadedFile) -> list[Bond]:
-    """Load bond universe from Excel/CSV file"""
+# Columns read from a bond universe file; Country, Sector and PaymentRank are optional
+BOND_COLUMNS = {
+    'ISIN', 'CleanPrice', 'YTM', 'ModifiedDuration', 'MaturityDate', 'CouponRate', 'CouponFrequency',
+    'CreditRating', 'MinPiece', 'IncrementSize', 'Currency', 'DayCountConvention', 'Issuer',
+    'Country', 'Sector', 'PaymentRank'
+}
+
+# Number of optimization results kept per universe, one per set of constraints
+MAX_CACHED_OPTIMIZATION_RESULTS = 16
+
+def load_bond_universe(uploaded_file: UploadedFile) -> Optional[BondTable]:
+    """Load bond universe from Excel/CSV file into a columnar BondTable"""
+    # Streamlit reruns the script on every interaction, so parsing is cached on the file content.
+    # The table is cached as a resource, so every rerun gets the same object rather than an
+    # unpickled copy, and caches keyed on the universe identity keep hitting.
+    return parse_bond_universe(uploaded_file.read(), uploaded_file.name)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def parse_bond_universe(content: bytes, file_name: str) -> Optional[BondTable]:
+    """Parse the content of a bond universe file into a columnar BondTable"""
     try:
-        logger.info(f"Loading bond universe from file: {uploaded_file.name}")
+        logger.info(f"Loading bond universe from file: {file_name}")
         # Get file extension from the name
-        file_extension = Path(uploaded_file.name).suffix.lower()
+        file_extension = Path(file_name).suffix.lower()
         
         # Read the file based on its extension
         if file_extension == '.csv':
-            df = pd.read_csv(uploaded_file)
+            # Read only the bond columns, the pyarrow engine does not take a callable usecols
+            header = pd.read_csv(io.BytesIO(content), nrows=0).columns
+            df = pd.read_csv(io.BytesIO(content), engine='pyarrow',
+                             usecols=[column for column in header if column in BOND_COLUMNS])
         elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(uploaded_file)
+            df = pd.read_excel(io.BytesIO(content), usecols=lambda column: column in BOND_COLUMNS)
         else:
             error_msg = f"Unsupported file format: {file_extension}"
             logger.error(error_msg)
             st.error(error_msg)
-            return []
+            return None
         
         logger.info(f"Successfully loaded {len(df)} rows from file")
         
-        bonds = []
-        for _, row in df.iterrows():
+        # Convert every column once; unparseable values become NaN/NaT
+        isin = df['ISIN'].astype(str).to_numpy()
+        numeric = {
+            column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+            for column in ['CleanPrice', 'YTM', 'ModifiedDuration', 'CouponRate',
+                           'CouponFrequency', 'MinPiece', 'IncrementSize']
+        }
+        maturity_date = pd.DatetimeIndex(pd.to_datetime(df['MaturityDate'], errors='coerce'))
+        
+        # Parse each distinct rating string once
+        rating_codes, rating_labels = pd.factorize(df['CreditRating'].astype(str))
+        parsed_ratings = []
+        for label in rating_labels:
             try:
-                # Parse credit rating using the new from_string method
-                credit_rating = CreditRating.from_string(str(row['CreditRating']))
-                
-                # Create base bond object
-                bond = Bond(
-                    isin=str(row['ISIN']),  # Ensure ISIN is string
-                    clean_price=float(row['CleanPrice']),
-                    ytm=float(row['YTM']),
-                    modified_duration=float(row['ModifiedDuration']),
-                    maturity_date=pd.to_datetime(row['MaturityDate']).to_pydatetime(),
-                    coupon_rate=float(row['CouponRate']),
-                    coupon_frequency=int(row['CouponFrequency']),
-                    credit_rating=credit_rating,
-                    min_piece=float(row['MinPiece']),
-                    increment_size=float(row['IncrementSize']),
-                    currency=str(row['Currency']),
-                    day_count_convention=str(row['DayCountConvention']),
-                    issuer=str(row['Issuer'])
-                )
-                
-                # Add new attributes if they exist in the file
-                if 'Country' in df.columns:
-                    setattr(bond, 'country', str(row['Country']))
-                if 'Sector' in df.columns:
-                    setattr(bond, 'sector', str(row['Sector']))
-                if 'PaymentRank' in df.columns:
-                    setattr(bond, 'payment_rank', str(row['PaymentRank']))
-                    
-                bonds.append(bond)
-            except Exception as e:
-                error_msg = f"Error loading bond {row.get('ISIN', 'Unknown')}: {str(e)}"
-                logger.error(error_msg)
-                st.error(error_msg)
+                parsed_ratings.append(CreditRating.from_string(label))
+            except ValueError:
+                parsed_ratings.append(None)
+        credit_rating = np.array(parsed_ratings, dtype=object)[rating_codes]
+        
+        # Report rows that cannot be converted and skip them
+        invalid = maturity_date.isna() | pd.isna(credit_rating)
+        for values in numeric.values():
+            invalid |= np.isnan(values)
+        for i in np.flatnonzero(invalid):
+            error_msg = f"Error loading bond {isin[i]}: invalid or missing values in row {i + 1}"
+            logger.error(error_msg)
+            st.error(error_msg)
+        
+        valid = ~invalid
+        
+        def text_column(name: str) -> np.ndarray:
+            return df[name].astype(str).to_numpy()[valid]
+        
+        # Column arrays keyed by Bond field name, aligned on the valid rows
+        fields = {
+            'isin': isin[valid],
+            'clean_price': numeric['CleanPrice'][valid],
+            'ytm': numeric['YTM'][valid],
+            'modified_duration': numeric['ModifiedDuration'][valid],
+            'maturity_date': maturity_date[valid].to_pydatetime(),
+            'coupon_rate': numeric['CouponRate'][valid],
+            'coupon_frequency': numeric['CouponFrequency'][valid].astype(int),
+            'credit_rating': credit_rating[valid],
+            'min_piece': numeric['MinPiece'][valid],
+            'increment_size': numeric['IncrementSize'][valid],
+            'currency': text_column('Currency'),
+            'day_count_convention': text_column('DayCountConvention'),
+            'issuer': text_column('Issuer'),
+        }
+        # Add new attributes if they exist in the file
+        for field, column in [('country', 'Country'), ('sector', 'Sector'), ('payment_rank', 'PaymentRank')]:
+            if column in df.columns:
+                fields[field] = text_column(column)
+        
+        names = list(fields)
+        bonds = [
+            Bond(**dict(zip(names, values)))
+            for values in zip(*(column.tolist() for column in fields.values()))
+        ]
         
         logger.info(f"Successfully created {len(bonds)} bond objects")
-        return bonds
+        table = BondTable.from_bonds(bonds)
+        # Derive the filter facets with the table, so the filter panel never scans the universe
+        _ = table.facets
+        return table
     except Exception as e:
         error_msg = f"Error loading file: {str(e)}"
         logger.exception(error_msg)
         st.error(error_msg)
-        return []
+        return None
+
+@st.cache_resource(show_spinner=False)
+def get_filter_manager() -> FilterManager:
+    """Get the filter manager, built once and shared across reruns"""
+    return FilterManager()
+
+
+def get_universe_key(universe: List[Bond]) -> tuple:
+    """Key a universe on its identity and length, without touching the bonds"""
+    # The loaded and filtered universes are cached lists that are never edited in place,
+    # so the same list object means the same bonds. The key holds the list itself, so a
+    # recycled id cannot match.
+    return (universe, len(universe))
+
+def is_universe_key(key: tuple, universe: List[Bond]) -> bool:
+    """Check whether a key was made from this universe"""
+    return key[0] is universe and key[1] == len(universe)
+
+def get_optimizer(universe: List[Bond], constraints: PortfolioConstraints):
+    """Get the session's optimizer for a universe, keeping its compiled problem across reruns"""
+    # Imported here so cvxpy and the solvers load on the first optimization, not at startup
+    from app.optimization.engine import PortfolioOptimizer
+    
+    # A changed universe gets a new optimizer
+    cached = st.session_state.get('optimizer')
+    if cached is not None and is_universe_key(cached[0], universe):
+        optimizer = cached[1]
+        optimizer.set_constraints(constraints)
+    else:
+        optimizer = PortfolioOptimizer(universe, constraints)
+        st.session_state.optimizer = (get_universe_key(universe), optimizer)
+    return optimizer
+
+def optimize_portfolio(universe: List[Bond], constraints: PortfolioConstraints) -> OptimizationResult:
+    """Optimize a universe, reusing the session's result when the universe and constraints are unchanged"""
+    cached = st.session_state.get('optimization_results')
+    # Results are only kept for the current universe
+    if cached is None or not is_universe_key(cached[0], universe):
+        cached = (get_universe_key(universe), {})
+        st.session_state.optimization_results = cached
+    
+    constraints_key = constraints.model_dump_json()
+    result = cached[1].get(constraints_key)
+    if result is None:
+        result = get_optimizer(universe, constraints).optimize()
+        if len(cached[1]) >= MAX_CACHED_OPTIMIZATION_RESULTS:
+            # Evict the oldest result
+            del cached[1][next(iter(cached[1]))]
+        cached[1][constraints_key] = result
+    else:
+        logger.info("Reusing optimization result for unchanged constraints")
+    return result
 
 def main():
     """Main application entry point"""
@@ -108,13 +212,15 @@ def main():
         st.session_state.constraints = None
     if 'universe' not in st.session_state:
         st.session_state.universe = None
+    if 'universe_table' not in st.session_state:
+        st.session_state.universe_table = None
     if 'filtered_universe' not in st.session_state:
         st.session_state.filtered_universe = None
     if 'optimization_result' not in st.session_state:
         st.session_state.optimization_result = None
     
     # Initialize filter manager
-    filter_manager = FilterManager()
+    filter_manager = get_filter_manager()
     
     # File uploader for bond universe
     st.header("Bond Universe")
@@ -130,9 +236,11 @@ def main():
     
     # Load bond universe
     if uploaded_file:
-        universe = load_bond_universe(uploaded_file)
-        if universe:
+        universe_table = load_bond_universe(uploaded_file)
+        if universe_table:
+            universe = universe_table.bonds
             st.session_state.universe = universe
+            st.session_state.universe_table = universe_table
             st.success(f"Loaded {len(universe)} bonds")
 
             # Display universe summary with additional columns in expander
@@ -146,9 +254,9 @@ def main():
                     'Maturity': bond.maturity_date.strftime('%Y-%m-%d'),
                     'Rating': bond.credit_rating.display(),
                     'Issuer': bond.issuer,
-                    'Country': getattr(bond, 'country', 'Unknown'),
-                    'Sector': getattr(bond, 'sector', 'Unknown'),
-                    'Payment Rank': getattr(bond, 'payment_rank', 'Unknown'),
+                    'Country': bond.country,
+                    'Sector': bond.sector,
+                    'Payment Rank': bond.payment_rank,
                     'Min Piece': f"{bond.min_piece:,.2f}",
                     'Increment': f"{bond.increment_size:,.2f}"
                 } for bond in universe])
@@ -169,7 +277,7 @@ def main():
                     st.plotly_chart(fig, use_container_width=True)
                     
                     # Sector distribution
-                    sector_dist = df['Sector'].value_counts()
+                    sector_dist = limit_categories(df['Sector'].value_counts())
                     st.subheader("Sector Distribution")
                     fig = go.Figure(data=[go.Bar(
                         x=sector_dist.values,
@@ -198,7 +306,7 @@ def main():
                     st.plotly_chart(fig, use_container_width=True)
                     
                     # Country distribution
-                    country_dist = df['Country'].value_counts()
+                    country_dist = limit_categories(df['Country'].value_counts())
                     st.subheader("Country Distribution")
                     fig = px.pie(
                         values=country_dist.values,
@@ -214,7 +322,7 @@ def main():
     
 
             # Apply filters
-            filtered_universe = render_filter_controls(universe, filter_manager)
+            filtered_universe = render_filter_controls(universe, filter_manager, universe_table)
             st.session_state.filtered_universe = filtered_universe
             
     # Get constraints and check if optimization should run
@@ -236,8 +344,7 @@ def main():
                 optimization_universe = st.session_state.filtered_universe or st.session_state.universe
                 
                 if optimization_universe:
-                    optimizer = PortfolioOptimizer(optimization_universe, constraints)
-                    result = optimizer.optimize()
+                    result = optimize_portfolio(optimization_universe, constraints)
                     logger.info(f"Optimization completed with status: {result.status}")
                     
                     if result.success:
@@ -246,31 +353,30 @@ def main():
                         display_optimization_results(result, optimization_universe, constraints.total_size)
 
                         # Add download buttons for results
-                        portfolio_df = pd.DataFrame([{
-                            'ISIN': isin,
-                            'Weight': weight,
-                            'Notional': weight * constraints.total_size,
-                            'Bond': next(b for b in optimization_universe if b.isin == isin)
-                        } for isin, weight in result.portfolio.items()])
-                        
-                        # Add bond details
-                        portfolio_df['Issuer'] = portfolio_df['Bond'].apply(lambda x: x.issuer)
-                        portfolio_df['Rating'] = portfolio_df['Bond'].apply(lambda x: x.credit_rating.display())
-                        portfolio_df['YTM'] = portfolio_df['Bond'].apply(lambda x: x.ytm)
-                        portfolio_df['Duration'] = portfolio_df['Bond'].apply(lambda x: x.modified_duration)
-                        portfolio_df['Min Piece'] = portfolio_df['Bond'].apply(lambda x: x.min_piece)
-                        portfolio_df['Increment'] = portfolio_df['Bond'].apply(lambda x: x.increment_size)
+                        bond_by_isin = get_bond_index(optimization_universe)
+                        rows = []
+                        for isin, weight in result.portfolio.items():
+                            bond = bond_by_isin[isin]
+                            rows.append({
+                                'ISIN': isin,
+                                'Weight': weight,
+                                'Notional': weight * constraints.total_size,
+                                'Issuer': bond.issuer,
+                                'Rating': bond.credit_rating.display(),
+                                'YTM': bond.ytm,
+                                'Duration': bond.modified_duration,
+                                'Min Piece': bond.min_piece,
+                                'Increment': bond.increment_size
+                            })
+                        portfolio_df = pd.DataFrame(rows)
                         
-                        # Drop Bond column and sort by Weight
-                        portfolio_df = portfolio_df.drop('Bond', axis=1).sort_values('Weight', ascending=False)
+                        # Sort by Weight
+                        portfolio_df = portfolio_df.sort_values('Weight', ascending=False)
                         
                         # Format columns
-                        portfolio_df['Weight'] = portfolio_df['Weight'].apply(lambda x: f"{x:.2%}")
-                        portfolio_df['Notional'] = portfolio_df['Notional'].apply(lambda x: f"{x:,.2f}")
-                        portfolio_df['YTM'] = portfolio_df['YTM'].apply(lambda x: f"{x:.2%}")
-                        portfolio_df['Duration'] = portfolio_df['Duration'].apply(lambda x: f"{x:.2f}")
-                        portfolio_df['Min Piece'] = portfolio_df['Min Piece'].apply(lambda x: f"{x:,.2f}")
-                        portfolio_df['Increment'] = portfolio_df['Increment'].apply(lambda x: f"{x:,.2f}")
+                        for column, fmt in [('Weight', '{:.2%}'), ('Notional', '{:,.2f}'), ('YTM', '{:.2%}'),
+                                            ('Duration', '{:.2f}'), ('Min Piece', '{:,.2f}'), ('Increment', '{:,.2f}')]:
+                            portfolio_df[column] = portfolio_df[column].map(fmt.format)
                         
                     else:
                         st.error(f"Optimization failed: {result.status}")
@@ -1,6 +1,7 @@
 import cvxpy as cp
 import numpy as np
-from typing import List, Dict, Optional
+import scipy.sparse as sp
+from typing import Any, Iterable, List, Dict, Optional
 import logging
 from ..data.models import Bond, PortfolioConstraints, CreditRating, OptimizationResult, RatingGrade
 from .solver_manager import SolverManager
@@ -9,12 +10,146 @@ from .solver_manager import SolverManager
 logger = logging.getLogger(__name__)
 
 class PortfolioOptimizer:
+    # Constraint fields that only change parameter values of the cached problem
+    PARAMETER_FIELDS = (
+        'target_duration', 'duration_tolerance', 'min_rating', 'rating_tolerance', 'min_yield',
+        'min_position_size', 'max_position_size', 'min_securities', 'max_securities', 'max_issuer_exposure'
+    )
+
     def __init__(self, universe: List[Bond], constraints: PortfolioConstraints):
         self.universe = universe
         self.constraints = constraints
         self.solver_manager = SolverManager()
         logger.info(f"Initializing optimizer with {len(universe)} bonds")
         
+        # Bond attributes as arrays, built once and shared by problem setup and metrics
+        n = len(universe)
+        self._ytm = np.fromiter((bond.ytm for bond in universe), dtype=np.float64, count=n)
+        self._duration = np.fromiter((bond.modified_duration for bond in universe), dtype=np.float64, count=n)
+        self._rating_scores = np.fromiter((bond.credit_rating.value for bond in universe), dtype=np.float64, count=n)
+        # Rating scores are the CreditRating values, so the grade is a comparison on the array
+        self._is_high_yield = self._rating_scores > CreditRating.BBB_MINUS.value
+        self._isins = [bond.isin for bond in universe]
+        self._isin_to_idx = {isin: i for i, isin in enumerate(self._isins)}
+        # Duration, yield and rating rows, so the three portfolio averages are one product
+        self._metric_matrix = np.vstack([self._duration, self._ytm, self._rating_scores])
+        issuer_code_by_name: Dict[str, int] = {}
+        self._issuer_codes = np.fromiter(
+            (issuer_code_by_name.setdefault(bond.issuer, len(issuer_code_by_name)) for bond in universe),
+            dtype=np.int32, count=n
+        )
+        self._issuers = list(issuer_code_by_name)
+        # Sparse issuers x bonds matrix; row u sums the weights of issuer u's bonds
+        self._issuer_matrix = sp.csr_matrix(
+            (np.ones(n), (self._issuer_codes, np.arange(n))), shape=(len(self._issuers), n)
+        )
+        
+        # The CVXPY problem is built once and reused while only parameter values change
+        self._problem: Optional[cp.Problem] = None
+        self._lp_problem: Optional[cp.Problem] = None
+        self._problem_key: Optional[tuple] = None
+        self._params: Dict[str, cp.Parameter] = {}
+    
+    def set_constraints(self, constraints: PortfolioConstraints):
+        """Replace the constraints used by the next optimize() call
+        
+        Changes to scalar limits only update parameter values of the cached problem;
+        the problem is rebuilt when the grade, sector, payment rank or maturity
+        bucket constraints change.
+        """
+        self.constraints = constraints
+    
+    def sweep(self, field: str, values: Iterable[Any]) -> List[OptimizationResult]:
+        """Optimize once per value of a scalar constraint, reusing the compiled problem
+        
+        Only fields held in problem parameters can be swept (see PARAMETER_FIELDS),
+        e.g. 'target_duration' or 'min_yield' for a duration or yield frontier.
+        The original constraints are restored afterwards.
+        """
+        if field not in self.PARAMETER_FIELDS:
+            raise ValueError(f"Cannot sweep {field}: it is not a parameterized constraint")
+        
+        base_constraints = self.constraints
+        results = []
+        try:
+            for value in values:
+                self.set_constraints(base_constraints.model_copy(update={field: value}))
+                results.append(self.optimize())
+        finally:
+            self.set_constraints(base_constraints)
+        return results
+    
+    def _structure_key(self) -> tuple:
+        """Constraint settings that change the shape of the problem rather than parameter values"""
+        return (
+            tuple(sorted((grade.value, tuple(bounds)) for grade, bounds in self.constraints.grade_constraints.items())),
+            self.constraints.max_hy_position_size,
+            tuple(sorted(self.constraints.sector_constraints.items())),
+            tuple(sorted(self.constraints.payment_rank_constraints.items())),
+            tuple(sorted(self.constraints.maturity_bucket_constraints.items())),
+        )
+    
+    def _setup_parameters(self):
+        """Setup the parameters holding the scalar constraint limits"""
+        self._params = {
+            'min_duration': cp.Parameter(),
+            'max_duration': cp.Parameter(),
+            'max_rating_score': cp.Parameter(),
+            'min_yield': cp.Parameter(),
+            'min_position_size': cp.Parameter(nonneg=True),
+            'max_position_size': cp.Parameter(nonneg=True),
+            'min_securities': cp.Parameter(nonneg=True),
+            'max_securities': cp.Parameter(nonneg=True),
+            'max_issuer_exposure': cp.Parameter(nonneg=True),
+        }
+    
+    def _update_parameters(self):
+        """Copy the current constraint limits into the problem parameters"""
+        values = {
+            'min_duration': self.constraints.target_duration - self.constraints.duration_tolerance,
+            'max_duration': self.constraints.target_duration + self.constraints.duration_tolerance,
+            'max_rating_score': float(self.constraints.min_rating.value) + self.constraints.rating_tolerance,
+            'min_yield': self.constraints.min_yield,
+            'min_position_size': self.constraints.min_position_size,
+            'max_position_size': self.constraints.max_position_size,
+            'min_securities': self.constraints.min_securities,
+            'max_securities': self.constraints.max_securities,
+            'max_issuer_exposure': self.constraints.max_issuer_exposure,
+        }
+        for name, value in values.items():
+            self._params[name].value = value
+        
+        # The limits change without rebuilding the problem, so they are logged and checked here
+        logger.info(f"Setting duration constraints: target={self.constraints.target_duration:.2f}, tolerance={self.constraints.duration_tolerance:.2f}")
+        min_duration = self._duration.min()
+        max_duration = self._duration.max()
+        logger.info(f"Universe duration range: min={min_duration:.2f}, max={max_duration:.2f}")
+        if values['min_duration'] > max_duration or values['max_duration'] < min_duration:
+            logger.warning(f"Duration constraint may be infeasible: target range [{values['min_duration']:.2f}, {values['max_duration']:.2f}] vs universe range [{min_duration:.2f}, {max_duration:.2f}]")
+        
+        min_rating_score = float(self.constraints.min_rating.value)
+        logger.info(f"Setting rating constraints: min={CreditRating.from_score(min_rating_score).display()}, max={CreditRating.from_score(values['max_rating_score']).display()}")
+        min_rating = self._rating_scores.min()
+        max_rating = self._rating_scores.max()
+        logger.info(f"Universe rating range: min={CreditRating.from_score(min_rating).display()}, max={CreditRating.from_score(max_rating).display()}")
+        if min_rating_score > max_rating:
+            logger.warning(f"Rating constraint may be infeasible: minimum required rating {CreditRating.from_score(min_rating_score).display()} is better than best available rating {CreditRating.from_score(max_rating).display()}")
+        
+        logger.info(f"Setting minimum yield constraint: {self.constraints.min_yield:.2%}")
+        min_yield = self._ytm.min()
+        max_yield = self._ytm.max()
+        logger.info(f"Universe yield range: min={min_yield:.2%}, max={max_yield:.2%}")
+        if self.constraints.min_yield > max_yield:
+            logger.warning(f"Yield constraint may be infeasible: minimum required yield {self.constraints.min_yield:.2%} is higher than maximum available yield {max_yield:.2%}")
+        
+        logger.info(f"Setting security count constraints: min={self.constraints.min_securities}, max={self.constraints.max_securities}")
+        if self.constraints.min_securities * self.constraints.min_position_size > 1:
+            logger.warning(f"Position size constraint may be infeasible: minimum {self.constraints.min_securities} securities at {self.constraints.min_position_size:.1%} each requires {self.constraints.min_securities * self.constraints.min_position_size:.1%} total")
+        if self.constraints.max_securities * self.constraints.max_position_size < 1:
+            logger.warning(f"Position size constraint may be infeasible: maximum {self.constraints.max_securities} securities at {self.constraints.max_position_size:.1%} each allows only {self.constraints.max_securities * self.constraints.max_position_size:.1%} total")
+        logger.info(f"Setting position size constraints: min={self.constraints.min_position_size:.2%}, max={self.constraints.max_position_size:.2%}")
+        logger.info(f"Setting issuer exposure constraint: max={self.constraints.max_issuer_exposure:.2%}")
+        
     def _setup_variables(self):
         """Setup optimization variables"""
         logger.info("Setting up optimization variables")
@@ -25,8 +160,7 @@ class PortfolioOptimizer:
         logger.info("Setting up optimization objective")
         
         # Simple yield maximization
-        yields = np.array([bond.ytm for bond in self.universe])
-        objective = cp.Maximize(yields @ self.weights)
+        objective = cp.Maximize(self._ytm @ self.weights)
         logger.info(f"Objective created with {len(self.universe)} components")
         
         return objective, []
@@ -40,88 +174,30 @@ class PortfolioOptimizer:
         logger.info("Adding portfolio weight constraints")
         constraints.append(cp.sum(self.weights) == 1)  # Sum of weights = 1
         constraints.append(self.weights >= 0)  # No short selling
+        
+        # Portfolio duration, yield and rating as one matrix-vector product
+        portfolio_duration, portfolio_yield, portfolio_rating = self._metric_matrix @ self.weights
+
+        # Duration, rating, yield, position size and issuer limits are parameters; their values
+        # are logged and checked for feasibility in _update_parameters, before every solve
 
         # Duration constraints
-        logger.info(f"Adding duration constraints: target={self.constraints.target_duration:.2f}, tolerance={self.constraints.duration_tolerance:.2f}")
-        duration_vector = np.array([bond.modified_duration for bond in self.universe])
-        min_duration = min(duration_vector)
-        max_duration = max(duration_vector)
-        logger.info(f"Universe duration range: min={min_duration:.2f}, max={max_duration:.2f}")
-        
-        target_min = self.constraints.target_duration - self.constraints.duration_tolerance
-        target_max = self.constraints.target_duration + self.constraints.duration_tolerance
-        if target_min > max_duration or target_max < min_duration:
-            logger.warning(f"Duration constraint may be infeasible: target range [{target_min:.2f}, {target_max:.2f}] vs universe range [{min_duration:.2f}, {max_duration:.2f}]")
-        
-        portfolio_duration = duration_vector @ self.weights
-        constraints.append(portfolio_duration <= self.constraints.target_duration + self.constraints.duration_tolerance)
-        constraints.append(portfolio_duration >= self.constraints.target_duration - self.constraints.duration_tolerance)
+        constraints.append(portfolio_duration <= self._params['max_duration'])
+        constraints.append(portfolio_duration >= self._params['min_duration'])
 
         # Rating constraints
-        min_rating_score = float(self.constraints.min_rating.value)  # Convert enum value to float
-        max_rating_score = min_rating_score + self.constraints.rating_tolerance
-        logger.info(f"Adding rating constraints: min={CreditRating.from_score(min_rating_score).display()}, max={CreditRating.from_score(max_rating_score).display()}")
-        
-        ratings = [bond.credit_rating.value for bond in self.universe]
-        min_rating = min(ratings)
-        max_rating = max(ratings)
-        logger.info(f"Universe rating range: min={CreditRating.from_score(min_rating).display()}, max={CreditRating.from_score(max_rating).display()}")
-        
-        if min_rating_score > max_rating:
-            logger.warning(f"Rating constraint may be infeasible: minimum required rating {CreditRating.from_score(min_rating_score).display()} is better than best available rating {CreditRating.from_score(max_rating).display()}")
-        
-        rating_vector = np.array([float(bond.credit_rating.value) for bond in self.universe])  # Convert each rating to float
-        portfolio_rating = rating_vector @ self.weights
-        constraints.append(portfolio_rating <= max_rating_score)
+        constraints.append(portfolio_rating <= self._params['max_rating_score'])
 
         # Yield constraint
-        logger.info(f"Adding minimum yield constraint: {self.constraints.min_yield:.2%}")
-        yield_vector = np.array([bond.ytm for bond in self.universe])
-        min_yield = min(yield_vector)
-        max_yield = max(yield_vector)
-        logger.info(f"Universe yield range: min={min_yield:.2%}, max={max_yield:.2%}")
-        
-        if self.constraints.min_yield > max_yield:
-            logger.warning(f"Yield constraint may be infeasible: minimum required yield {self.constraints.min_yield:.2%} is higher than maximum available yield {max_yield:.2%}")
-        
-        portfolio_yield = yield_vector @ self.weights
-        constraints.append(portfolio_yield >= self.constraints.min_yield)
-
-        # Maximum number of securities constraint
-        logger.info(f"Adding security count constraints: min={self.constraints.min_securities}, max={self.constraints.max_securities}")
-        if self.constraints.min_securities * self.constraints.min_position_size > 1:
-            logger.warning(f"Position size constraint may be infeasible: minimum {self.constraints.min_securities} securities at {self.constraints.min_position_size:.1%} each requires {self.constraints.min_securities * self.constraints.min_position_size:.1%} total")
-        if self.constraints.max_securities * self.constraints.max_position_size < 1:
-            logger.warning(f"Position size constraint may be infeasible: maximum {self.constraints.max_securities} securities at {self.constraints.max_position_size:.1%} each allows only {self.constraints.max_securities * self.constraints.max_position_size:.1%} total")
-        
-        binary_vars = cp.Variable(len(self.universe), boolean=True)
-        M = 1  # Big M value (1 is sufficient since weights are between 0 and 1)
+        constraints.append(portfolio_yield >= self._params['min_yield'])
 
-        # Link binary variables to weights and enforce position size constraints
-        logger.info(f"Adding position size constraints: min={self.constraints.min_position_size:.2%}, max={self.constraints.max_position_size:.2%}")
-        for i in range(len(self.universe)):
-            # Weight must be 0 if binary is 0
-            constraints.append(self.weights[i] <= M * binary_vars[i])
-            # If binary is 1, weight must be at least min_position_size
-            constraints.append(self.weights[i] >= self.constraints.min_position_size * binary_vars[i])
-            # Weight cannot exceed max_position_size
-            constraints.append(self.weights[i] <= self.constraints.max_position_size)
-
-        # Constraint on number of securities
-        constraints.append(cp.sum(binary_vars) <= self.constraints.max_securities)
-        constraints.append(cp.sum(binary_vars) >= self.constraints.min_securities)
+        # Weight cannot exceed max_position_size
+        constraints.append(self.weights <= self._params['max_position_size'])
 
         # Issuer exposure constraints
-        logger.info(f"Adding issuer exposure constraint: max={self.constraints.max_issuer_exposure:.2%}")
-        unique_issuers = set(bond.issuer for bond in self.universe)
-        logger.info(f"Found {len(unique_issuers)} unique issuers in universe")
-        for issuer in unique_issuers:
-            issuer_bonds = [bond for bond in self.universe if bond.issuer == issuer]
-            if len(issuer_bonds) > 0:
-                logger.info(f"Issuer {issuer}: {len(issuer_bonds)} bonds available")
-            issuer_indices = [i for i, bond in enumerate(self.universe) if bond.issuer == issuer]
-            issuer_exposure = cp.sum(self.weights[issuer_indices])
-            constraints.append(issuer_exposure <= self.constraints.max_issuer_exposure)
+        logger.info(f"Found {len(self._issuers)} unique issuers in universe")
+        issuer_exposure = self._issuer_matrix @ self.weights
+        constraints.append(issuer_exposure <= self._params['max_issuer_exposure'])
 
         # Grade constraints
         if self.constraints.grade_constraints:
@@ -130,11 +206,11 @@ class PortfolioOptimizer:
                 min_weight, max_weight = self.constraints.grade_constraints[RatingGrade.HIGH_YIELD]
                 logger.info(f"Processing High Yield constraints: min={min_weight:.1%}, max={max_weight:.1%}")
                 
-                hy_indices = [i for i, bond in enumerate(self.universe) if bond.rating_grade == RatingGrade.HIGH_YIELD]
+                hy_indices = np.flatnonzero(self._is_high_yield)
                 logger.info(f"Found {len(hy_indices)} High Yield bonds in universe")
                 
                 # Only add constraint if we have high yield bonds and constraints are meaningful
-                if hy_indices:
+                if len(hy_indices):
                     hy_exposure = cp.sum(self.weights[hy_indices])
                     if min_weight > 0:
                         logger.info(f"Adding minimum High Yield constraint: {min_weight:.1%}")
@@ -196,42 +272,97 @@ class PortfolioOptimizer:
         logger.info(f"Total number of constraints: {len(constraints)}")
         return constraints
 
+    def _setup_cardinality_constraints(self):
+        """Setup the binary position constraints (minimum position size and number of securities)"""
+        constraints = []
+        binary_vars = cp.Variable(len(self.universe), boolean=True)
+
+        # Link binary variables to weights, as one vector constraint each way.
+        # Weights are already capped at max_position_size, so it is the tightest Big M
+        # and gives a closer LP relaxation than M = 1.
+        # Weight must be 0 if binary is 0
+        constraints.append(self.weights <= self._params['max_position_size'] * binary_vars)
+        # If binary is 1, weight must be at least min_position_size
+        constraints.append(self.weights >= self._params['min_position_size'] * binary_vars)
+
+        # Constraint on number of securities
+        constraints.append(cp.sum(binary_vars) <= self._params['max_securities'])
+        constraints.append(cp.sum(binary_vars) >= self._params['min_securities'])
+        return constraints
+
+    def _meets_cardinality(self, weights: np.ndarray) -> bool:
+        """Check whether a relaxed solution already satisfies the binary position constraints"""
+        held = weights[weights > 1e-5]
+        return (
+            self.constraints.min_securities <= len(held) <= self.constraints.max_securities
+            and bool(np.all(held >= self.constraints.min_position_size - 1e-6))
+        )
+
     def optimize(self) -> OptimizationResult:
         """Run the optimization"""
         logger.info("Starting optimization")
         
         try:
-            # Setup optimization variables
-            logger.info("Setting up optimization variables")
-            self.weights = cp.Variable(len(self.universe))
-            
-            # Setup objective and constraints
-            objective, additional_constraints = self._setup_objective()
-            constraints = self._setup_constraints()
-            
-            # Check if constraints are empty (indicating infeasibility)
-            if not constraints:
-                logger.error("Problem is infeasible due to invalid constraints")
-                return OptimizationResult(
-                    success=False,
-                    portfolio={},
-                    metrics={},
-                    constraints_satisfied=False,
-                    constraint_violations=["Invalid constraints - check grade constraints and bond availability"]
-                )
-            
-            constraints.extend(additional_constraints)
+            structure_key = self._structure_key()
+            if self._problem is None or self._problem_key != structure_key:
+                # Setup optimization variables
+                logger.info("Setting up optimization variables")
+                self.weights = cp.Variable(len(self.universe))
+                self._setup_parameters()
+                
+                # Setup objective and constraints
+                objective, additional_constraints = self._setup_objective()
+                constraints = self._setup_constraints()
+                
+                # Check if constraints are empty (indicating infeasibility)
+                if not constraints:
+                    logger.error("Problem is infeasible due to invalid constraints")
+                    self._problem = None
+                    return OptimizationResult(
+                        success=False,
+                        status="infeasible",
+                        solve_time=0.0,
+                        portfolio={},
+                        metrics={},
+                        constraints_satisfied=False,
+                        constraint_violations=["Invalid constraints - check grade constraints and bond availability"],
+                        optimization_status="infeasible"
+                    )
+                
+                constraints.extend(additional_constraints)
+                
+                # Create the LP relaxation and the full mixed-integer problem
+                self._lp_problem = cp.Problem(objective, constraints)
+                self._problem = cp.Problem(objective, constraints + self._setup_cardinality_constraints())
+                self._problem_key = structure_key
+                # Parameter changes only skip recompilation when the problem follows the DPP rules
+                if not self._problem.is_dpp():
+                    logger.warning("Optimization problem is not DPP, it will be recompiled on every solve")
+            else:
+                logger.info("Reusing the cached problem with updated parameters")
             
-            # Create and solve problem
-            problem = cp.Problem(objective, constraints)
-            status, solve_time = self.solver_manager.solve(problem)
+            # Solve with the current constraint limits. The LP relaxation drops the binary
+            # position variables; if its optimum already meets the position count and minimum
+            # size limits it is optimal for the full problem too, and branch-and-bound is skipped.
+            # The relaxation's feasible set contains the full problem's, so an infeasible
+            # relaxation means the full problem is infeasible as well.
+            self._update_parameters()
+            status, solve_time = self.solver_manager.solve(self._lp_problem, warm_start=True)
+            if status == cp.INFEASIBLE:
+                logger.warning("LP relaxation is infeasible, skipping the mixed-integer solve")
+            elif status in ['optimal', 'optimal_inaccurate'] and self._meets_cardinality(self.weights.value):
+                logger.info("LP relaxation satisfies the position constraints, skipping the mixed-integer solve")
+            else:
+                status, milp_solve_time = self.solver_manager.solve(self._problem, warm_start=True)
+                solve_time += milp_solve_time
             
             if status in ['optimal', 'optimal_inaccurate']:
                 # Extract results
-                portfolio = {}
-                for i, bond in enumerate(self.universe):
-                    if self.weights.value[i] > 1e-5:  # Filter out very small positions
-                        portfolio[bond.isin] = float(self.weights.value[i])
+                weights = self.weights.value
+                portfolio = {
+                    self._isins[i]: float(weights[i])
+                    for i in np.flatnonzero(weights > 1e-5)  # Filter out very small positions
+                }
                 
                 # Calculate portfolio metrics
                 metrics = self._calculate_portfolio_metrics(portfolio)
@@ -291,32 +422,23 @@ class PortfolioOptimizer:
 
     def _calculate_portfolio_metrics(self, portfolio: Dict[str, float]) -> Dict[str, float]:
         """Calculate portfolio metrics"""
-        weights = np.array([portfolio.get(bond.isin, 0) for bond in self.universe])
+        weights = self._portfolio_weights(portfolio)
         
-        # Calculate weighted average yield
-        ytms = np.array([bond.ytm for bond in self.universe])
-        portfolio_yield = ytms @ weights
-        
-        # Calculate weighted average duration
-        durations = np.array([bond.modified_duration for bond in self.universe])
-        portfolio_duration = durations @ weights
-        
-        # Calculate weighted average rating
-        ratings = np.array([bond.credit_rating.value for bond in self.universe])
-        portfolio_rating = ratings @ weights
+        # Calculate weighted average duration, yield and rating
+        portfolio_duration, portfolio_yield, portfolio_rating = self._metric_matrix @ weights
         
         # Calculate number of securities
-        num_securities = sum(1 for w in weights if w > 1e-4)
+        held = np.flatnonzero(weights > 1e-4)
+        num_securities = len(held)
 
         # Calculate number of issuers
-        issuers = set(bond.issuer for bond, w in zip(self.universe, weights) if w > 1e-4)
-        num_issuers = len(issuers)
+        num_issuers = len(np.unique(self._issuer_codes[held]))
         
         # Calculate grade exposures
-        grade_exposures = {}
-        for grade in RatingGrade:
-            grade_indices = [i for i, bond in enumerate(self.universe) if bond.rating_grade == grade]
-            grade_exposures[f"grade_{grade.value}"] = float(sum(weights[i] for i in grade_indices))
+        grade_exposures = {
+            f"grade_{RatingGrade.INVESTMENT_GRADE.value}": float(weights[~self._is_high_yield].sum()),
+            f"grade_{RatingGrade.HIGH_YIELD.value}": float(weights[self._is_high_yield].sum())
+        }
         
         return {
             'yield': portfolio_yield,
@@ -327,92 +449,114 @@ class PortfolioOptimizer:
             **grade_exposures
         }
 
+    def _evaluate_constraints(self, portfolio: Dict[str, float]) -> Dict[str, Any]:
+        """Compute the portfolio figures and violation flags used by the constraint checks"""
+        epsilon = 1e-2  # Small tolerance for numerical precision
+        c = self.constraints
+        weights = self._portfolio_weights(portfolio)
+        duration, yield_, rating = (float(x) for x in self._metric_matrix @ weights)
+        position_weights = np.fromiter(portfolio.values(), dtype=np.float64, count=len(portfolio))
+        num_securities = int(np.count_nonzero(position_weights > epsilon))
+        issuer_exposures = np.bincount(self._issuer_codes, weights=weights, minlength=len(self._issuers))
+        
+        hy_bounds = c.grade_constraints.get(RatingGrade.HIGH_YIELD) if c.grade_constraints else None
+        hy_exposure = float(weights[self._is_high_yield].sum())
+        
+        flags = {
+            'duration_low': duration < c.target_duration - c.duration_tolerance - epsilon,
+            'duration_high': duration > c.target_duration + c.duration_tolerance + epsilon,
+            'rating': rating > c.min_rating.value + c.rating_tolerance,
+            'too_few': num_securities < c.min_securities,
+            'too_many': num_securities > c.max_securities,
+            'above_max': position_weights > c.max_position_size + epsilon,
+            'below_min': (position_weights < c.min_position_size - epsilon) & (position_weights > epsilon),
+            'issuers': issuer_exposures > c.max_issuer_exposure + epsilon,
+            'hy_low': hy_bounds is not None and hy_bounds[0] > 0 and hy_exposure < hy_bounds[0] - epsilon,
+            'hy_high': hy_bounds is not None and hy_bounds[1] < 1 and hy_exposure > hy_bounds[1] + epsilon,
+            'yield': yield_ < c.min_yield - epsilon,
+        }
+        return {
+            'flags': flags,
+            'any': any(bool(np.any(flag)) for flag in flags.values()),
+            'duration': duration,
+            'yield': yield_,
+            'rating': rating,
+            'num_securities': num_securities,
+            'position_weights': position_weights,
+            'issuer_exposures': issuer_exposures,
+            'hy_bounds': hy_bounds,
+            'hy_exposure': hy_exposure,
+        }
+
     def _check_constraint_violations(self, portfolio: Dict[str, float]) -> List[str]:
         """Check if portfolio satisfies all constraints"""
+        checks = self._evaluate_constraints(portfolio)
+        # Messages are only formatted when something is violated
+        if not checks['any']:
+            return []
+        
         violations = []
-        epsilon = 1e-2  # Small tolerance for numerical precision
+        c = self.constraints
+        flags = checks['flags']
         
         # Check duration constraints
-        portfolio_duration = self._calculate_portfolio_duration(portfolio)
-        if portfolio_duration < self.constraints.target_duration - self.constraints.duration_tolerance - epsilon:
+        if flags['duration_low']:
             violations.append(
-                f"Duration below target range: {portfolio_duration:.2f} < "
-                f"{self.constraints.target_duration - self.constraints.duration_tolerance:.2f}"
+                f"Duration below target range: {checks['duration']:.2f} < "
+                f"{c.target_duration - c.duration_tolerance:.2f}"
             )
-        elif portfolio_duration > self.constraints.target_duration + self.constraints.duration_tolerance + epsilon:
+        elif flags['duration_high']:
             violations.append(
-                f"Duration above target range: {portfolio_duration:.2f} > "
-                f"{self.constraints.target_duration + self.constraints.duration_tolerance:.2f}"
+                f"Duration above target range: {checks['duration']:.2f} > "
+                f"{c.target_duration + c.duration_tolerance:.2f}"
             )
         
         # Check rating constraints
-        portfolio_rating = self._calculate_portfolio_rating(portfolio)
-        if portfolio_rating > self.constraints.min_rating.value + self.constraints.rating_tolerance:
+        if flags['rating']:
             violations.append(
-                f"Portfolio rating below minimum: {CreditRating.from_score(portfolio_rating).display()} < "
-                f"{self.constraints.min_rating.display()}"
+                f"Portfolio rating below minimum: {CreditRating.from_score(checks['rating']).display()} < "
+                f"{c.min_rating.display()}"
             )
         
         # Check number of securities constraints
-        num_securities = sum(1 for w in portfolio.values() if w > epsilon)
-        if num_securities < self.constraints.min_securities:
-            violations.append(f"Too few securities: {num_securities} < {self.constraints.min_securities}")
-        elif num_securities > self.constraints.max_securities:
-            violations.append(f"Too many securities: {num_securities} > {self.constraints.max_securities}")
+        if flags['too_few']:
+            violations.append(f"Too few securities: {checks['num_securities']} < {c.min_securities}")
+        elif flags['too_many']:
+            violations.append(f"Too many securities: {checks['num_securities']} > {c.max_securities}")
         
         # Check position size constraints
-        for isin, weight in portfolio.items():
-            if weight > self.constraints.max_position_size + epsilon:
-                violations.append(f"Position {isin} exceeds maximum size: {weight:.4f} > {self.constraints.max_position_size:.4f}")
-            elif weight < self.constraints.min_position_size - epsilon and weight > epsilon:
-                violations.append(f"Position {isin} below minimum size: {weight:.4f} < {self.constraints.min_position_size:.4f}")
+        isins = list(portfolio)
+        position_weights = checks['position_weights']
+        for i in np.flatnonzero(flags['above_max'] | flags['below_min']):
+            isin, weight = isins[i], position_weights[i]
+            if flags['above_max'][i]:
+                violations.append(f"Position {isin} exceeds maximum size: {weight:.4f} > {c.max_position_size:.4f}")
+            else:
+                violations.append(f"Position {isin} below minimum size: {weight:.4f} < {c.min_position_size:.4f}")
         
         # Check issuer constraints
-        issuer_exposures = {}
-        for isin, weight in portfolio.items():
-            bond = next(b for b in self.universe if b.isin == isin)
-            issuer_exposures[bond.issuer] = issuer_exposures.get(bond.issuer, 0) + weight
-        
-        for issuer, exposure in issuer_exposures.items():
-            if exposure > self.constraints.max_issuer_exposure + epsilon:
-                violations.append(
-                    f"Issuer {issuer} exposure exceeds maximum: {exposure:.4f} > {self.constraints.max_issuer_exposure:.4f}"
-                )
+        issuer_exposures = checks['issuer_exposures']
+        for code in np.flatnonzero(flags['issuers']):
+            violations.append(
+                f"Issuer {self._issuers[code]} exposure exceeds maximum: "
+                f"{issuer_exposures[code]:.4f} > {c.max_issuer_exposure:.4f}"
+            )
         
-        # Check grade constraints
-        if self.constraints.grade_constraints:
-            # Only handle High Yield constraints
-            if RatingGrade.HIGH_YIELD in self.constraints.grade_constraints:
-                min_weight, max_weight = self.constraints.grade_constraints[RatingGrade.HIGH_YIELD]
-                hy_indices = [i for i, bond in enumerate(self.universe) if bond.rating_grade == RatingGrade.HIGH_YIELD]
-                hy_exposure = sum(portfolio.get(bond.isin, 0) for i, bond in enumerate(self.universe) if i in hy_indices)
-                
-                if min_weight > 0 and hy_exposure < min_weight - epsilon:
-                    violations.append(f"Minimum High Yield exposure not met: {hy_exposure:.2%} < {min_weight:.2%}")
-                if max_weight < 1 and hy_exposure > max_weight + epsilon:
-                    violations.append(f"Maximum High Yield exposure exceeded: {hy_exposure:.2%} > {max_weight:.2%}")
+        # Check grade constraints (only High Yield is handled)
+        if flags['hy_low']:
+            violations.append(f"Minimum High Yield exposure not met: {checks['hy_exposure']:.2%} < {checks['hy_bounds'][0]:.2%}")
+        if flags['hy_high']:
+            violations.append(f"Maximum High Yield exposure exceeded: {checks['hy_exposure']:.2%} > {checks['hy_bounds'][1]:.2%}")
         
         # Check yield constraint
-        portfolio_yield = self._calculate_portfolio_yield(portfolio)
-        if portfolio_yield < self.constraints.min_yield - epsilon:
-            violations.append(f"Minimum yield constraint violated: {portfolio_yield:.4f} < {self.constraints.min_yield:.4f}")
+        if flags['yield']:
+            violations.append(f"Minimum yield constraint violated: {checks['yield']:.4f} < {c.min_yield:.4f}")
         
         return violations
 
-    def _calculate_portfolio_rating(self, portfolio: Dict[str, float]) -> float:
-        """Calculate portfolio rating score"""
-        weights = np.array([portfolio.get(bond.isin, 0) for bond in self.universe])
-        rating_values = np.array([bond.credit_rating.value for bond in self.universe])
-        return float(rating_values @ weights)
-
-    def _calculate_portfolio_duration(self, portfolio: Dict[str, float]) -> float:
-        """Calculate portfolio duration"""
-        weights = np.array([portfolio.get(bond.isin, 0) for bond in self.universe])
-        durations = np.array([bond.modified_duration for bond in self.universe])
-        return float(durations @ weights)
-
-    def _calculate_portfolio_yield(self, portfolio: Dict[str, float]) -> float:
-        """Calculate portfolio yield"""
-        weights = np.array([portfolio.get(bond.isin, 0) for bond in self.universe])
-        yields = np.array([bond.ytm for bond in self.universe])
-        return float(yields @ weights)
+    def _portfolio_weights(self, portfolio: Dict[str, float]) -> np.ndarray:
+        """Get the weight vector of a portfolio, aligned with the universe"""
+        weights = np.zeros(len(self.universe))
+        for isin, weight in portfolio.items():
+            weights[self._isin_to_idx[isin]] = weight
+        return weights
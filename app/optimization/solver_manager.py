@@ -6,14 +6,24 @@ from typing import Optional, List, Tuple
 # Get logger
 logger = logging.getLogger(__name__)
 
+# Statuses that prove the problem has no optimum, so other solvers would only confirm them
+CONCLUSIVE_FAILURES = (cp.INFEASIBLE, cp.UNBOUNDED)
+
 class SolverManager:
     def __init__(self):
         self.primary_solver = 'SCIP'  # SCIP is good for mixed-integer problems
         self.fallback_solvers = ['ECOS_BB', 'GLPK_MI']  # Other mixed-integer capable solvers
+        # Continuous problems go to LP solvers; HiGHS (through SCIPY) returns vertex solutions
+        self.lp_primary_solver = 'SCIPY'
+        self.lp_fallback_solvers = ['CLARABEL', 'ECOS']
         
-    def solve(self, problem: cp.Problem, max_iters: int = 10000000) -> Tuple[Optional[str], float]:
+    def solve(self, problem: cp.Problem, max_iters: int = 10000000,
+              warm_start: bool = False) -> Tuple[Optional[str], float]:
         """Attempt to solve the optimization problem with various solvers
         
+        Args:
+            warm_start: Start from the previous solution when the problem was solved before
+        
         Returns:
             Tuple[Optional[str], float]: (solver status, solve time in seconds)
         """
@@ -26,25 +36,34 @@ class SolverManager:
         logger.info(f"Problem characteristics - Integer vars: {has_integer}, "
                    f"Quadratic: {has_quadratic}")
         
+        if has_integer:
+            primary_solver, fallback_solvers = self.primary_solver, self.fallback_solvers
+        else:
+            primary_solver, fallback_solvers = self.lp_primary_solver, self.lp_fallback_solvers
+        
         start_time = time.time()
         
         # Try primary solver first
         try:
-            logger.info(f"Attempting solution with {self.primary_solver}")
+            logger.info(f"Attempting solution with {primary_solver}")
             result = problem.solve(
-                solver=self.primary_solver,
-                verbose=True
+                solver=primary_solver,
+                verbose=True,
+                warm_start=warm_start
             )
             solve_time = time.time() - start_time
             if problem.status in ['optimal', 'optimal_inaccurate']:
-                logger.info(f"Primary solver {self.primary_solver} succeeded with status: {problem.status}")
+                logger.info(f"Primary solver {primary_solver} succeeded with status: {problem.status}")
                 return problem.status, solve_time
-            logger.warning(f"Primary solver {self.primary_solver} failed with status: {problem.status}")
+            if problem.status in CONCLUSIVE_FAILURES:
+                logger.warning(f"Primary solver {primary_solver} proved the problem {problem.status}")
+                return problem.status, solve_time
+            logger.warning(f"Primary solver {primary_solver} failed with status: {problem.status}")
         except Exception as e:
-            logger.warning(f"Primary solver {self.primary_solver} failed with error: {str(e)}")
+            logger.warning(f"Primary solver {primary_solver} failed with error: {str(e)}")
         
         # Try fallback solvers
-        for solver in self.fallback_solvers:
+        for solver in fallback_solvers:
             try:
                 logger.info(f"Attempting solution with fallback solver {solver}")
                 solver_opts = {}
@@ -65,12 +84,16 @@ class SolverManager:
                 result = problem.solve(
                     solver=solver,
                     verbose=True,
+                    warm_start=warm_start,
                     **solver_opts
                 )
                 solve_time = time.time() - start_time
                 if problem.status in ['optimal', 'optimal_inaccurate']:
                     logger.info(f"Fallback solver {solver} succeeded with status: {problem.status}")
                     return problem.status, solve_time
+                if problem.status in CONCLUSIVE_FAILURES:
+                    logger.warning(f"Fallback solver {solver} proved the problem {problem.status}")
+                    return problem.status, solve_time
                 logger.warning(f"Fallback solver {solver} failed with status: {problem.status}")
             except Exception as e:
                 logger.warning(f"Fallback solver {solver} failed with error: {str(e)}")
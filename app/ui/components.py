@@ -1,12 +1,79 @@
 import streamlit as st
 import pandas as pd
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from app.data.models import Bond, PortfolioConstraints, CreditRating, OptimizationResult, RatingGrade
-import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import numpy as np
 
+# Ratings never change, so the selectbox options and chart order are built once at import
+_RATING_OPTIONS = list(CreditRating)
+_ORDERED_RATING_DISPLAYS = [rating.display() for rating in CreditRating.get_ordered_ratings()]
+_RATING_GRADE_BY_DISPLAY = {rating.display(): RatingGrade.from_rating(rating).value for rating in CreditRating}
+# Pie and bar charts draw at most this many categories, the rest are summed into 'Other'
+MAX_CHART_CATEGORIES = 12
+# Rows of the complete portfolio table rendered before "Show all" is ticked
+PORTFOLIO_TABLE_ROWS = 50
+
+# Complete portfolio columns shown as percentages and as formatted amounts
+_PERCENT_COLUMNS = ['ytm', 'weight', 'rounded_weight', 'coupon']
+_MONEY_COLUMNS = ['target_notional', 'rounded_notional', 'min_piece', 'increment']
+# Table column configs are static, so they are built once at import
+_TOP_BONDS_COLUMN_CONFIG = {
+    'isin': 'ISIN',
+    'issuer': 'Issuer',
+    'coupon': st.column_config.NumberColumn('Coupon', format="%.2f%%"),
+    'ytm': st.column_config.NumberColumn('YTM', format="%.2f%%"),
+    'weight': st.column_config.NumberColumn('Weight', format="%.2f%%"),
+    'maturity': st.column_config.DatetimeColumn('Maturity', format="YYYY-MM-DD"),
+    'currency': 'Currency',
+    'payment_rank': 'Payment Rank'
+}
+_PORTFOLIO_COLUMN_CONFIG = {
+    'isin': 'ISIN',
+    'issuer': 'Issuer',
+    'rating': 'Rating',
+    'payment_rank': 'Payment Rank',
+    'ytm': st.column_config.NumberColumn('YTM', format="%.2f%%"),
+    'currency': 'Currency',
+    'duration': 'Duration',
+    'weight': st.column_config.NumberColumn('Target Weight', format="%.2f%%"),
+    'rounded_weight': st.column_config.NumberColumn('Rounded Weight', format="%.2f%%"),
+    'target_notional': 'Target Notional',
+    'rounded_notional': 'Rounded Notional',
+    'min_piece': 'Min Piece',
+    'increment': 'Increment',
+    'country': 'Country',
+    'coupon': st.column_config.NumberColumn('Coupon', format="%.2f%%"),
+    'maturity': st.column_config.DatetimeColumn('Maturity', format="YYYY-MM-DD"),
+    'grade': 'Grade',
+    'warning': 'Warning',
+    'sector': 'Sector'
+}
+
+
+def limit_categories(values: pd.Series, limit: int = MAX_CHART_CATEGORIES) -> pd.Series:
+    """Keep the largest categories of a breakdown and sum the others into 'Other'"""
+    if len(values) <= limit:
+        return values
+    top = values.nlargest(limit - 1)
+    other = top.get('Other', 0) + values.drop(top.index).sum()
+    # A categorical index cannot take the new label
+    top.index = top.index.astype(object)
+    top['Other'] = other
+    return top
+
+
+def get_bond_index(universe: List[Bond]) -> Dict[str, Bond]:
+    """Get the ISIN to bond lookup of a universe, built once per universe"""
+    cached = st.session_state.get('bond_index')
+    # Universes are reused across reruns, so identity tells the index is current
+    if cached is not None and cached[0] is universe:
+        return cached[1]
+    bond_index = {bond.isin: bond for bond in universe}
+    st.session_state.bond_index = (universe, bond_index)
+    return bond_index
+
 
 def initialize_constraint_state():
     """Initialize session state for constraints if not exists"""
@@ -113,7 +180,7 @@ def render_main_constraints_form(universe: List[Bond]):
         with col1:
             min_rating = st.selectbox(
                 "Minimum Rating",
-                options=list(CreditRating),
+                options=_RATING_OPTIONS,
                 format_func=lambda x: x.display(),
                 index=len(CreditRating) - 10  # Default to BBB-
             )
@@ -243,12 +310,17 @@ def render_main_constraints_form(universe: List[Bond]):
     return None, False
 
 
+@st.fragment
 def render_optional_constraints(universe: List[Bond]):
-    """Render the optional constraints section"""
+    """Render the optional constraints section
+    
+    Runs as a fragment, so editing, adding or removing a row only reruns this section.
+    Rows are added and removed in button callbacks, which run before the fragment reruns.
+    """
     
     # Get unique sectors and payment ranks from universe
-    available_sectors = sorted(list(set(bond.sector for bond in universe if bond.sector)))
-    available_payment_ranks = sorted(list(set(bond.payment_rank for bond in universe if bond.payment_rank)))
+    available_sectors = sorted({bond.sector for bond in universe if bond.sector})
+    available_payment_ranks = sorted({bond.payment_rank for bond in universe if bond.payment_rank})
     
     st.subheader("Optional Constraints")
     
@@ -279,15 +351,11 @@ def render_optional_constraints(universe: List[Bond]):
             with col3:
                 st.write("")
                 st.write("")
-                if st.button("🗑️", key=f"remove_sector_{i}"):
-                    remove_constraint_row('sector', i)
-                    st.rerun()
+                st.button("🗑️", key=f"remove_sector_{i}", on_click=remove_constraint_row, args=('sector', i))
             st.session_state.sector_constraints[i] = (sector, max_exposure)
         
         # Add new sector constraint
-        if st.button("Add Sector"):
-            add_constraint_row('sector', ("", 1.0))
-            st.rerun()
+        st.button("Add Sector", on_click=add_constraint_row, args=('sector', ("", 1.0)))
 
     # Payment rank constraints
     with st.expander("Payment Rank Constraints", expanded=False):
@@ -316,15 +384,11 @@ def render_optional_constraints(universe: List[Bond]):
             with col3:
                 st.write("")
                 st.write("")
-                if st.button("🗑️", key=f"remove_rank_{i}"):
-                    remove_constraint_row('payment_rank', i)
-                    st.rerun()
+                st.button("🗑️", key=f"remove_rank_{i}", on_click=remove_constraint_row, args=('payment_rank', i))
             st.session_state.payment_rank_constraints[i] = (rank, max_exposure)
         
         # Add new payment rank constraint
-        if st.button("Add Payment Rank"):
-            add_constraint_row('payment_rank', ("", 1.0))
-            st.rerun()
+        st.button("Add Payment Rank", on_click=add_constraint_row, args=('payment_rank', ("", 1.0)))
             
     # Maturity bucket constraints
     with st.expander("Maturity Bucket Constraints", expanded=False):
@@ -364,15 +428,11 @@ def render_optional_constraints(universe: List[Bond]):
             with col4:
                 st.write("")
                 st.write("")
-                if st.button("🗑️", key=f"remove_maturity_{i}"):
-                    remove_constraint_row('maturity_bucket', i)
-                    st.rerun()
+                st.button("🗑️", key=f"remove_maturity_{i}", on_click=remove_constraint_row, args=('maturity_bucket', i))
             st.session_state.maturity_bucket_constraints[i] = (start_year, end_year, max_exposure)
         
         # Add new maturity bucket constraint
-        if st.button("Add Maturity Bucket"):
-            add_constraint_row('maturity_bucket', (datetime.now().year, datetime.now().year+1, 1.0))
-            st.rerun()
+        st.button("Add Maturity Bucket", on_click=add_constraint_row, args=('maturity_bucket', (datetime.now().year, datetime.now().year+1, 1.0)))
 
 def render_constraints_form(universe: List[Bond]):
     """Render both main and optional constraints forms"""
@@ -382,27 +442,244 @@ def render_constraints_form(universe: List[Bond]):
     return constraints, run_optimization
 
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def _build_portfolio_frame(portfolio: Dict[str, float], bonds: List[Bond], total_size: float) -> pd.DataFrame:
+    """Build the portfolio table of a result, with bonds aligned to the portfolio ISINs
+
+    Cached on the held positions only, so reruns showing the same result reuse the table.
+    """
+    isins = list(portfolio)
+    weights = np.fromiter(portfolio.values(), dtype=float, count=len(isins))
+    notionals = weights * total_size  # Use passed total_size parameter
+    min_notionals = np.array([bond.min_piece for bond in bonds], dtype=float)
+    increments = np.array([bond.increment_size for bond in bonds], dtype=float)
+    rating_scores = np.array([bond.credit_rating.value for bond in bonds], dtype=int)
+
+    # Calculate rounded notionals: positions below the minimum piece are dropped,
+    # the others are rounded down to the increment but not below the minimum piece
+    too_small = notionals < min_notionals
+    rounded_down = (notionals // increments) * increments
+    rounded_up = ~too_small & (rounded_down < min_notionals)
+    rounded_notionals = np.where(too_small, 0.0, np.maximum(rounded_down, min_notionals))
+    warnings = np.full(len(isins), "", dtype=object)
+    for i in np.flatnonzero(too_small):
+        warnings[i] = f"Position too small (min: {min_notionals[i]:,.0f})"
+    for i in np.flatnonzero(rounded_up):
+        warnings[i] = f"Rounded up to minimum piece size ({min_notionals[i]:,.0f})"
+
+    # Columns are typed arrays, so the constructor does not infer dtypes from Python lists.
+    # Low-cardinality labels are categoricals, so grouping on them works on integer codes.
+    df_portfolio = pd.DataFrame({
+        'isin': np.array(isins, dtype=object),
+        'weight': weights,
+        'country': pd.Categorical([bond.country for bond in bonds]),
+        'issuer': np.array([bond.issuer for bond in bonds], dtype=object),
+        'coupon': np.array([bond.coupon_rate for bond in bonds], dtype=float),
+        'maturity': np.array([bond.maturity_date for bond in bonds], dtype='datetime64[ns]'),
+        'currency': np.array([bond.currency for bond in bonds], dtype=object),
+        'ytm': np.array([bond.ytm for bond in bonds], dtype=float),
+        'duration': np.array([bond.modified_duration for bond in bonds], dtype=float),
+        'rating': pd.Categorical([bond.credit_rating.display() for bond in bonds],
+                                 categories=_ORDERED_RATING_DISPLAYS, ordered=True),
+        'grade': pd.Categorical(
+            np.where(rating_scores <= CreditRating.BBB_MINUS.value,
+                     RatingGrade.INVESTMENT_GRADE.value, RatingGrade.HIGH_YIELD.value),
+            categories=[grade.value for grade in RatingGrade]
+        ),
+        'payment_rank': np.array([bond.payment_rank for bond in bonds], dtype=object),
+        'target_notional': notionals,
+        'rounded_notional': rounded_notionals,
+        'min_piece': min_notionals,
+        'increment': increments,
+        'warning': warnings,
+        'sector': np.array([bond.sector for bond in bonds], dtype=object)
+    })
+
+    # Add rounded weight column
+    df_portfolio['rounded_weight'] = df_portfolio['rounded_notional'] / total_size
+    # Sort on the numeric weights, before any column is formatted as text
+    df_portfolio = df_portfolio.sort_values('weight', ascending=False, ignore_index=True)
+
+    return df_portfolio
+
+
+# The chart builders hand numeric data to plotly as NumPy arrays, which its JSON encoder
+# serializes in bulk rather than element by element
+@st.cache_data(show_spinner=False, max_entries=32)
+def _build_pie_figure(title: str, names: Tuple, values: Tuple) -> go.Figure:
+    """Build a breakdown pie chart, cached on its data"""
+    fig = go.Figure(go.Pie(labels=list(names), values=np.asarray(values, dtype=float)))
+    fig.update_layout(title=title)
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _build_sector_figure(sectors: Tuple[str, ...], weights: Tuple[float, ...]) -> go.Figure:
+    """Build the sector breakdown bar chart, cached on its data"""
+    fig = go.Figure(data=[go.Bar(
+        x=np.asarray(weights, dtype=float) * 100,  # Convert to percentage
+        y=list(sectors),
+        orientation='h'
+    )])
+    fig.update_layout(
+        title='Sector Breakdown',
+        xaxis_title='Weight (%)',
+        yaxis_title='Sector',
+        showlegend=False,
+        height=400,
+        yaxis={'categoryorder': 'total ascending'}
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _build_rating_figure(ratings: Tuple[str, ...], rating_weights: Tuple[float, ...],
+                         grades: Tuple[str, ...], grade_weights: Tuple[float, ...]) -> go.Figure:
+    """Build the rating breakdown chart with its rating and grade views, cached on its data"""
+    # Create two bar charts
+    fig = go.Figure()
+
+    # Detailed rating breakdown
+    rating_percents = np.asarray(rating_weights, dtype=float) * 100
+    fig.add_trace(go.Bar(
+        x=list(ratings),
+        y=rating_percents,
+        name='By Rating',
+        visible=True,
+        text=[f"{x:.1f}%" for x in rating_percents],
+        textposition='outside',
+    ))
+
+    # IG/HY breakdown
+    grade_percents = np.asarray(grade_weights, dtype=float) * 100
+    fig.add_trace(go.Bar(
+        x=list(grades),
+        y=grade_percents,
+        name='By Grade',
+        visible=False,
+        text=[f"{x:.1f}%" for x in grade_percents],
+        textposition='outside',
+    ))
+
+    # Add buttons to switch between views
+    fig.update_layout(
+        title='Rating Breakdown',
+        yaxis_title='Weight (%)',
+        xaxis_title='Credit Rating',
+        updatemenus=[{
+            'buttons': [
+                {'label': 'By Rating', 'method': 'update', 'args': [{'visible': [True, False]}]},
+                {'label': 'By Grade', 'method': 'update', 'args': [{'visible': [False, True]}]}
+            ],
+            'direction': 'down',
+            'showactive': True,
+        }]
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _build_cash_flow_figure(years: Tuple[int, ...], coupons: Tuple[float, ...],
+                            redemptions: Tuple[float, ...]) -> go.Figure:
+    """Build the stacked cash flow chart, cached on its data"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=np.asarray(years),
+        y=np.asarray(coupons, dtype=float),
+        name='Coupons'
+    ))
+    fig.add_trace(go.Bar(
+        x=np.asarray(years),
+        y=np.asarray(redemptions, dtype=float),
+        name='Redemptions'
+    ))
+
+    fig.update_layout(
+        title='Cash Flow Distribution',
+        xaxis_title='Year',
+        yaxis_title='Amount',
+        barmode='stack'
+    )
+    return fig
+
+
+def _compute_result_tables(result: OptimizationResult, universe: List[Bond], total_size: float) -> Dict[str, Any]:
+    """Build the portfolio table and the aggregates shown in the results"""
+    bond_by_isin = get_bond_index(universe)
+    df_portfolio = _build_portfolio_frame(
+        result.portfolio, [bond_by_isin[isin] for isin in result.portfolio], total_size
+    )
+
+    # Country, rating and grade weights all come from one grouping of the table
+    country_rating_weights = df_portfolio.groupby(['country', 'rating'], sort=False, dropna=False,
+                                                  observed=True)['weight'].sum()
+    # Sort ratings according to risk order, but only keep non-zero values
+    rating_weights = country_rating_weights.groupby(level='rating', observed=True).sum()
+    rating_weights = rating_weights.reindex(_ORDERED_RATING_DISPLAYS)
+    rating_weights = rating_weights[rating_weights > 0]
+
+    maturity_years = df_portfolio['maturity'].dt.year.to_numpy()
+    rounded = df_portfolio['rounded_notional'].to_numpy()
+    first_year = datetime.now().year
+    years = range(first_year, int(maturity_years.max()) + 1)
+    # Bonds that matured before this year pay nothing in the range
+    live = maturity_years >= first_year
+    offsets = maturity_years[live] - first_year
+
+    # Redemptions using rounded notionals, summed per maturity year
+    redemptions = np.bincount(offsets, weights=rounded[live], minlength=len(years))
+    # Coupons using rounded notionals: a bond pays in every year up to its maturity,
+    # so the coupons of a year are the income of all bonds maturing that year or later
+    coupons = np.bincount(offsets, weights=rounded[live] * df_portfolio['coupon'].to_numpy()[live],
+                          minlength=len(years))[::-1].cumsum()[::-1]
+
+    # Complete portfolio table and its CSV export, both with thousands-separated amounts
+    df_money = df_portfolio.assign(
+        **{column: df_portfolio[column].map('{:,.2f}'.format) for column in _MONEY_COLUMNS}
+    )
+    # Percentages stay numeric on screen and are formatted by the column config
+    df_display = df_money.assign(**{column: df_money[column] * 100 for column in _PERCENT_COLUMNS})
+    csv = df_money.assign(
+        **{column: df_money[column].map('{:.2%}'.format) for column in _PERCENT_COLUMNS}
+    ).to_csv(index=False, date_format='%Y-%m-%d').encode('utf-8')
+
+    return {
+        'portfolio': df_portfolio,
+        'display': df_display,
+        'csv': csv,
+        'country_weights': limit_categories(country_rating_weights.groupby(level='country', observed=True).sum()),
+        'sector_weights': limit_categories(df_portfolio.groupby('sector')['weight'].sum()).sort_values(ascending=True),
+        'rating_weights': rating_weights,
+        'grade_weights': rating_weights.groupby(_RATING_GRADE_BY_DISPLAY).sum(),
+        'rank_weights': df_portfolio.groupby('payment_rank')['weight'].sum(),
+        'cash_flows': pd.DataFrame({
+            'year': years,
+            'coupons': coupons,
+            'redemptions': redemptions
+        }),
+        'issuer_weights': df_portfolio.groupby('issuer', sort=False)['weight'].sum().nlargest(10),
+    }
+
+
+def _get_result_tables(result: OptimizationResult, universe: List[Bond], total_size: float) -> Dict[str, Any]:
+    """Get the result tables, reusing them while the same result is displayed"""
+    cached = st.session_state.get('result_tables')
+    # Results and universes are reused across reruns, so identity tells the tables are current
+    if (cached is not None and cached[0] is result and cached[1] is universe
+            and cached[2] == (total_size, datetime.now().year)):
+        return cached[3]
+    tables = _compute_result_tables(result, universe, total_size)
+    st.session_state.result_tables = (result, universe, (total_size, datetime.now().year), tables)
+    return tables
+
+
+@st.fragment
 def display_optimization_results(result: OptimizationResult, universe: List[Bond], total_size: float):
-    """Display optimization results"""
+    """Display optimization results
+    
+    Runs as a fragment, so the download buttons only rerun the results instead of the whole app.
+    """
     
-    # Create portfolio dataframe with non-zero weights
-    portfolio_df = pd.DataFrame([
-        {
-            'ISIN': bond.isin,
-            'Issuer': bond.issuer,
-            'Country': bond.country,
-            'Sector': bond.sector,
-            'Rating': bond.credit_rating.display(),
-            'Payment Rank': bond.payment_rank,
-            'Maturity': bond.maturity_date.strftime('%Y-%m-%d'),
-            'Yield': bond.ytm,
-            'Duration': bond.modified_duration,
-            'Weight': result.portfolio.get(bond.isin, 0),
-            'Market Value': result.portfolio.get(bond.isin, 0) * total_size
-        }
-        for bond in universe if result.portfolio.get(bond.isin, 0) > 0
-    ])
-
     if not result.success:
         st.error("Optimization failed to find a solution")
         if result.constraint_violations:
@@ -418,6 +695,11 @@ def display_optimization_results(result: OptimizationResult, universe: List[Bond
             for violation in result.constraint_violations:
                 st.write(f"- {violation}")
 
+    tables = _get_result_tables(result, universe, total_size)
+    df_portfolio = tables['portfolio']
+    # Grade weights feed both the exposure metrics and the rating chart
+    grade_weights = tables['grade_weights']
+
     # Portfolio metrics
     st.subheader("Portfolio Metrics")
     col1, col2, col3, col4 = st.columns(4)
@@ -442,190 +724,51 @@ def display_optimization_results(result: OptimizationResult, universe: List[Bond
     grade_cols = st.columns(len(RatingGrade))
     for i, grade in enumerate(RatingGrade):
         with grade_cols[i]:
-            exposure = result.metrics.get(f'grade_{grade.value}', 0)
+            exposure = grade_weights.get(grade.value, 0)
             st.metric(grade.value, f"{exposure:.1%}")
 
     # Portfolio breakdown
     st.subheader("Portfolio Breakdown")
     col1, col2 = st.columns(2)
 
-    # Create portfolio dataframe
-    portfolio_data = []
-
-    for isin, weight in result.portfolio.items():
-        bond = next(b for b in universe if b.isin == isin)
-        notional = weight * total_size  # Use passed total_size parameter
-        min_notional = bond.min_piece
-        increment = bond.increment_size
-
-        # Calculate rounded notional
-        if notional < min_notional:
-            warning = f"Position too small (min: {min_notional:,.0f})"
-            rounded_notional = 0
-        else:
-            rounded_notional = (notional // increment) * increment
-            if rounded_notional < min_notional:
-                rounded_notional = min_notional
-                warning = f"Rounded up to minimum piece size ({min_notional:,.0f})"
-            else:
-                warning = ""
-
-        portfolio_data.append({
-            'isin': isin,
-            'weight': weight,
-            'country': bond.country,
-            'issuer': bond.issuer,
-            'coupon': bond.coupon_rate,
-            'maturity': bond.maturity_date,
-            'currency': bond.currency,
-            'ytm': bond.ytm,
-            'duration': bond.modified_duration,
-            'rating': bond.credit_rating.display(),
-            'grade': bond.rating_grade.value,
-            'payment_rank': bond.payment_rank,
-            'target_notional': notional,
-            'rounded_notional': rounded_notional,
-            'min_piece': min_notional,
-            'increment': increment,
-            'warning': warning,
-            'sector': bond.sector
-        })
-    df_portfolio = pd.DataFrame(portfolio_data)
-
-    # Add rounded weight column
-    df_portfolio['rounded_weight'] = df_portfolio['rounded_notional'] / total_size
-
+    # Figures are cached on their data, so reruns with the same portfolio skip building them
     # Country breakdown pie chart
     with col1:
-        country_weights = df_portfolio.groupby('country')['weight'].sum()
-        fig = px.pie(
-            values=country_weights.values,
-            names=country_weights.index,
-            title='Country Breakdown'
-        )
+        country_weights = tables['country_weights']
+        fig = _build_pie_figure('Country Breakdown', tuple(country_weights.index), tuple(country_weights.tolist()))
         st.plotly_chart(fig, use_container_width=True)
 
         # Sector breakdown bar chart
-        sector_weights = df_portfolio.groupby('sector')['weight'].sum().sort_values(ascending=True)
-        fig = go.Figure(data=[go.Bar(
-            x=sector_weights.values * 100,  # Convert to percentage
-            y=sector_weights.index,
-            orientation='h'
-        )])
-        fig.update_layout(
-            title='Sector Breakdown',
-            xaxis_title='Weight (%)',
-            yaxis_title='Sector',
-            showlegend=False,
-            height=400,
-            yaxis={'categoryorder': 'total ascending'}
-        )
+        sector_weights = tables['sector_weights']
+        fig = _build_sector_figure(tuple(sector_weights.index), tuple(sector_weights.tolist()))
         st.plotly_chart(fig, use_container_width=True)
 
     # Rating breakdown and Payment Rank
     with col2:
-        # Create two bar charts
-        fig = go.Figure()
-
-        # Get ordered ratings for proper x-axis ordering
-        ordered_ratings = [r.display() for r in CreditRating.get_ordered_ratings()]
-        
-        # Detailed rating breakdown
-        rating_weights = df_portfolio.groupby('rating')['weight'].sum()
-        # Sort according to risk order, but only keep non-zero values
-        rating_weights = rating_weights.reindex(ordered_ratings)[rating_weights.reindex(ordered_ratings) > 0]
-        
-        fig.add_trace(go.Bar(
-            x=rating_weights.index,
-            y=rating_weights.values * 100,
-            name='By Rating',
-            visible=True,
-            text=[f"{x:.1f}%" for x in rating_weights.values * 100],
-            textposition='outside',
-        ))
-
-        # IG/HY breakdown
-        grade_weights = df_portfolio.groupby('grade')['weight'].sum()
-        fig.add_trace(go.Bar(
-            x=grade_weights.index,
-            y=grade_weights.values * 100,
-            name='By Grade',
-            visible=False,
-            text=[f"{x:.1f}%" for x in grade_weights.values * 100],
-            textposition='outside',
-        ))
-
-        # Add buttons to switch between views
-        fig.update_layout(
-            title='Rating Breakdown',
-            yaxis_title='Weight (%)',
-            xaxis_title='Credit Rating',
-            updatemenus=[{
-                'buttons': [
-                    {'label': 'By Rating', 'method': 'update', 'args': [{'visible': [True, False]}]},
-                    {'label': 'By Grade', 'method': 'update', 'args': [{'visible': [False, True]}]}
-                ],
-                'direction': 'down',
-                'showactive': True,
-            }]
+        # Detailed rating breakdown and IG/HY breakdown
+        rating_weights = tables['rating_weights']
+        fig = _build_rating_figure(
+            tuple(rating_weights.index), tuple(rating_weights.tolist()),
+            tuple(grade_weights.index), tuple(grade_weights.tolist())
         )
         st.plotly_chart(fig, use_container_width=True)
 
         # Payment Rank breakdown
-        rank_weights = df_portfolio.groupby('payment_rank')['weight'].sum()
-        fig = px.pie(
-            values=rank_weights.values * 100,  # Convert to percentage
-            names=rank_weights.index,
-            title='Payment Rank Breakdown'
+        rank_weights = tables['rank_weights']
+        fig = _build_pie_figure(
+            'Payment Rank Breakdown',
+            tuple(rank_weights.index),
+            tuple((rank_weights * 100).tolist())  # Convert to percentage
         )
         st.plotly_chart(fig, use_container_width=True)
 
     # Cash flow distribution
     st.subheader("Cash Flow Distribution")
-    years = range(datetime.now().year, max(df_portfolio['maturity']).year + 1)
-    coupons = []
-    redemptions = []
-
-    for year in years:
-        # Calculate coupon payments using rounded notionals
-        year_coupons = sum(
-            row['rounded_notional'] * row['coupon']
-            for _, row in df_portfolio.iterrows()
-            if row['maturity'].year >= year
-        )
-        coupons.append(year_coupons)
-
-        # Calculate redemptions using rounded notionals
-        year_redemptions = sum(
-            row['rounded_notional']
-            for _, row in df_portfolio.iterrows()
-            if row['maturity'].year == year
-        )
-        redemptions.append(year_redemptions)
-
-    cash_flows = pd.DataFrame({
-        'year': years,
-        'coupons': coupons,
-        'redemptions': redemptions
-    })
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=list(years),
-        y=coupons,
-        name='Coupons'
-    ))
-    fig.add_trace(go.Bar(
-        x=list(years),
-        y=redemptions,
-        name='Redemptions'
-    ))
-
-    fig.update_layout(
-        title='Cash Flow Distribution',
-        xaxis_title='Year',
-        yaxis_title='Amount',
-        barmode='stack'
+    cash_flows = tables['cash_flows']
+    fig = _build_cash_flow_figure(
+        tuple(cash_flows['year'].tolist()),
+        tuple(cash_flows['coupons'].tolist()),
+        tuple(cash_flows['redemptions'].tolist())
     )
     st.plotly_chart(fig, use_container_width=True)
 
@@ -649,13 +792,9 @@ def display_optimization_results(result: OptimizationResult, universe: List[Bond
     with col1:
         # Top 10 issuers
         st.subheader("Top 10 Issuers")
-        issuer_weights = df_portfolio.groupby('issuer')['weight'].sum().sort_values(ascending=False).head(10)
-        issuer_df = pd.DataFrame({
-            'Issuer': issuer_weights.index,
-            'Weight': issuer_weights.values * 100  # Convert to percentage
-        })
+        issuer_weights = tables['issuer_weights']
         st.dataframe(
-            issuer_df,
+            (issuer_weights * 100).rename_axis('Issuer').reset_index(name='Weight'),  # Convert to percentage
             column_config={
                 'Weight': st.column_config.NumberColumn(
                     'Weight',
@@ -668,82 +807,47 @@ def display_optimization_results(result: OptimizationResult, universe: List[Bond
     with col2:
         # Top 10 bonds
         st.subheader("Top 10 Bonds")
-        top_bonds = df_portfolio.nlargest(10, 'weight')[
+        # The portfolio table is already sorted by weight, so the top rows are the largest
+        top_bonds = df_portfolio[
             ['isin', 'issuer', 'coupon', 'maturity', 'currency', 'ytm', 'weight', 'payment_rank']
-        ].copy()
-        top_bonds['coupon'] = top_bonds['coupon'].map('{:.2%}'.format)
-        top_bonds['ytm'] = top_bonds['ytm'].map('{:.2%}'.format)
-        top_bonds['weight'] = top_bonds['weight'].map('{:.2%}'.format)
-        top_bonds['maturity'] = top_bonds['maturity'].dt.strftime('%Y-%m-%d')
-
-        st.dataframe(top_bonds, 
-        column_config={
-            'isin': 'ISIN',
-            'issuer': 'Issuer',
-            'coupon': 'Coupon',
-            'ytm': 'YTM',
-            'weight': 'Weight',
-            'maturity': 'Maturity',
-            'currency':'Currency',
-            'payment_rank': 'Payment Rank'
-        },
-        hide_index=True)
+        ].head(10)
+        # Percentages stay numeric and are formatted by the column config
+        top_bonds[['coupon', 'ytm', 'weight']] *= 100
+
+        st.dataframe(top_bonds, column_config=_TOP_BONDS_COLUMN_CONFIG, hide_index=True)
 
     # Complete portfolio
     st.subheader("Complete Portfolio")
-    df_display = df_portfolio.copy()
-    df_display['ytm'] = df_display['ytm'].map('{:.2%}'.format)
-    df_display['weight'] = df_display['weight'].map('{:.2%}'.format)
-    df_display['rounded_weight'] = df_display['rounded_weight'].map('{:.2%}'.format)
-    df_display['coupon'] = df_display['coupon'].map('{:.2%}'.format)
-    df_display['maturity'] = df_display['maturity'].dt.strftime('%Y-%m-%d')
-    df_display['target_notional'] = df_display['target_notional'].map('{:,.2f}'.format)
-    df_display['rounded_notional'] = df_display['rounded_notional'].map('{:,.2f}'.format)
-    df_display['min_piece'] = df_display['min_piece'].map('{:,.2f}'.format)
-    df_display['increment'] = df_display['increment'].map('{:,.2f}'.format)
+    df_display = tables['display']
 
+    # Large portfolios show their largest positions, the full table is rendered on request
+    df_shown = df_display
+    if len(df_display) > PORTFOLIO_TABLE_ROWS and not st.checkbox(
+            f"Show all {len(df_display)} positions", key='show-all-positions'):
+        df_shown = df_display.head(PORTFOLIO_TABLE_ROWS)
     st.dataframe(
-        df_display,
-        column_config={
-            'isin': 'ISIN',
-            'issuer': 'Issuer',
-            'rating': 'Rating',
-            'payment_rank': 'Payment Rank',
-            'ytm': 'YTM',
-            'currency': 'Currency',
-            'duration': 'Duration',
-            'weight': 'Target Weight',
-            'rounded_weight': 'Rounded Weight',
-            'target_notional': 'Target Notional',
-            'rounded_notional': 'Rounded Notional',
-            'min_piece': 'Min Piece',
-            'increment': 'Increment',
-            'country': 'Country',
-            'coupon': 'Coupon',
-            'maturity': 'Maturity',
-            'grade': 'Grade',
-            'warning': 'Warning',
-            'sector': 'Sector'
-        },
+        df_shown,
+        column_config=_PORTFOLIO_COLUMN_CONFIG,
         hide_index=True
     )
 
     # Add CSV download button
-    csv = df_display.to_csv(index=False).encode('utf-8')
     st.download_button(
         "📝 Download Portfolio as CSV",
-        csv,
+        tables['csv'],
         "portfolio.csv",
         "text/csv",
         key='download-csv'
     )
 
     # Display any warnings about position sizes
-    warnings = df_portfolio[df_portfolio['warning'] != '']
-    if not warnings.empty:
+    has_warning = (df_portfolio['warning'] != '').to_numpy()
+    if has_warning.any():
         st.warning("Position Size Adjustments Required:")
-        for _, row in warnings.iterrows():
-            st.write(f"- {row['isin']} ({row['issuer']}): {row['warning']}")
+        for isin, issuer, warning in zip(df_portfolio['isin'].to_numpy()[has_warning],
+                                         df_portfolio['issuer'].to_numpy()[has_warning],
+                                         df_portfolio['warning'].to_numpy()[has_warning]):
+            st.write(f"- {isin} ({issuer}): {warning}")
 
     # Show total portfolio metrics after rounding
     if len(df_portfolio) > 0:
@@ -1,11 +1,17 @@
 """Filter UI components"""
+import json
 import streamlit as st
 from typing import List, Dict, Any, Optional
 from app.data.models import Bond
+from app.data.universe import BondTable
 from app.filters import FilterManager
 import uuid
 from datetime import datetime
 
+def new_filter_id() -> str:
+    """Get a new id for an exclusion group or condition, used in its widget keys"""
+    return uuid.uuid4().hex
+
 def delete_condition(group_id: str, condition_index: int):
     """Callback to delete a condition from a group"""
     for group in st.session_state.active_filters['exclusion_groups']:
@@ -44,53 +50,110 @@ def on_maturity_change():
             'max': st.session_state.maturity_range[1]
         }
 
-def render_filter_controls(universe: List[Bond], filter_manager: FilterManager) -> Optional[List[Bond]]:
+def on_range_filters_submit():
+    """Callback applying all range sliders when the range filters form is submitted"""
+    on_ytm_change()
+    on_duration_change()
+    on_maturity_change()
+
+# Saving, updating and deleting run in button callbacks, before the script reruns and the
+# filter selectbox is created, so the selection can change without another rerun
+def on_save_filter(filter_manager: FilterManager):
+    """Callback saving the active filters as a new predefined filter"""
+    filter_name = st.session_state.get('filter_name', '')
+    filter_desc = st.session_state.get('filter_desc', '')
+    if not filter_name or not filter_desc:
+        st.session_state.save_filter_error = "Please provide both name and description"
+    elif filter_name in filter_manager.get_predefined_filters():
+        st.session_state.save_filter_error = f"Filter name '{filter_name}' already exists"
+    elif filter_manager.save_filter(filter_name, filter_desc, st.session_state.active_filters):
+        st.session_state.show_success_message = f"Filter '{filter_name}' saved successfully"
+        st.session_state.selected_predefined_filter = filter_name
+
+def on_delete_filter(filter_manager: FilterManager):
+    """Callback deleting the selected predefined filter"""
+    filter_to_delete = st.session_state.selected_predefined_filter
+    if filter_manager.delete_filter(filter_to_delete):
+        st.session_state.show_success_message = f"Filter '{filter_to_delete}' deleted"
+        st.session_state.selected_predefined_filter = "None"
+        st.session_state.filter_loaded = False
+
+def on_update_filter(filter_manager: FilterManager):
+    """Callback updating the selected predefined filter with the active filters"""
+    filter_to_update = st.session_state.selected_predefined_filter
+    if filter_manager.update_filter(filter_to_update, st.session_state.active_filters):
+        st.session_state.show_success_message = f"Filter '{filter_to_update}' updated successfully"
+
+# Categories that exclusion conditions can test
+CONDITION_CATEGORIES = ('sector', 'payment_rank', 'rating', 'issuer', 'country')
+CONDITION_CATEGORY_INDEX = {category: i for i, category in enumerate(CONDITION_CATEGORIES)}
+# Filtered universes kept per universe, so re-applying a filter configuration skips the filter pass
+MAX_CACHED_FILTER_RESULTS = 32
+
+def get_universe_facets(universe: List[Bond], table: Optional[BondTable] = None) -> Dict[str, Any]:
+    """Get the slider bounds and condition values of a universe"""
+    # The loaded universe carries its facets, derived once with its table
+    if table is not None and table.bonds is universe:
+        return table.facets
+
+    cached = st.session_state.get('universe_facets')
+    # Keep a reference to the universe so a recycled id cannot return stale facets
+    if cached is not None and cached[0] is universe:
+        return cached[1]
+    facets = BondTable.from_bonds(universe).facets
+    st.session_state.universe_facets = (universe, facets)
+    return facets
+
+def default_range_filters(facets: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Range filters spanning the whole universe"""
+    return {
+        field: {'min': facets[field][0], 'max': facets[field][1]}
+        for field in ('ytm', 'modified_duration', 'maturity_year')
+    }
+
+def ensure_active_filters(facets: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the active filters, filling in missing groups and range filters from the universe facets"""
+    if not isinstance(st.session_state.get('active_filters'), dict):
+        st.session_state.active_filters = {}
+    active_filters = st.session_state.active_filters
+    active_filters.setdefault('exclusion_groups', [])
+    range_filters = active_filters.setdefault('range_filters', {})
+    for field, bounds in default_range_filters(facets).items():
+        range_filters.setdefault(field, bounds)
+    return active_filters
+
+def filter_cache_key(filter_config: Dict[str, Any]) -> str:
+    """Serialize a filter configuration as a cache key, leaving out the widget ids of groups and conditions"""
+    groups = [
+        [{key: value for key, value in condition.items() if key != 'id'} for condition in group['conditions']]
+        for group in filter_config['exclusion_groups']
+    ]
+    return json.dumps({**filter_config, 'exclusion_groups': groups}, sort_keys=True, default=str)
+
+def filters_keep_universe(filter_config: Dict[str, Any], facets: Dict[str, Any]) -> bool:
+    """Check whether a normalized filter configuration keeps every bond of the universe"""
+    if filter_config['exclusion_groups']:
+        return False
+    for field, bounds in filter_config['range_filters'].items():
+        if field not in facets:
+            return False
+        min_val, max_val = bounds.get('min'), bounds.get('max')
+        if (min_val is not None and min_val > facets[field][0]) or (max_val is not None and max_val < facets[field][1]):
+            return False
+    return True
+
+def render_filter_controls(universe: List[Bond], filter_manager: FilterManager,
+                           table: Optional[BondTable] = None) -> Optional[List[Bond]]:
     """Render filter controls and return filtered universe"""
     if not universe:
         return None
         
     st.subheader("Universe Filters")
     
+    facets = get_universe_facets(universe, table)
+    
     # Initialize session state for filters if not exists
-    if 'active_filters' not in st.session_state:
-        st.session_state.active_filters = {
-            'exclusion_groups': [],
-            'range_filters': {
-                'ytm': {'min': min(bond.ytm for bond in universe), 'max': max(bond.ytm for bond in universe)},
-                'modified_duration': {'min': min(bond.modified_duration for bond in universe), 'max': max(bond.modified_duration for bond in universe)},
-                'maturity_year': {'min': min(bond.maturity_date.year for bond in universe), 'max': max(bond.maturity_date.year for bond in universe)}
-            }
-        }
-    elif not isinstance(st.session_state.active_filters, dict):
-        st.session_state.active_filters = {
-            'exclusion_groups': [],
-            'range_filters': {
-                'ytm': {'min': min(bond.ytm for bond in universe), 'max': max(bond.ytm for bond in universe)},
-                'modified_duration': {'min': min(bond.modified_duration for bond in universe), 'max': max(bond.modified_duration for bond in universe)},
-                'maturity_year': {'min': min(bond.maturity_date.year for bond in universe), 'max': max(bond.maturity_date.year for bond in universe)}
-            }
-        }
-    else:
-        # Ensure all required keys exist
-        if 'exclusion_groups' not in st.session_state.active_filters:
-            st.session_state.active_filters['exclusion_groups'] = []
-        if 'range_filters' not in st.session_state.active_filters:
-            st.session_state.active_filters['range_filters'] = {}
-        if 'ytm' not in st.session_state.active_filters.get('range_filters', {}):
-            st.session_state.active_filters['range_filters']['ytm'] = {
-                'min': min(bond.ytm for bond in universe),
-                'max': max(bond.ytm for bond in universe)
-            }
-        if 'modified_duration' not in st.session_state.active_filters.get('range_filters', {}):
-            st.session_state.active_filters['range_filters']['modified_duration'] = {
-                'min': min(bond.modified_duration for bond in universe),
-                'max': max(bond.modified_duration for bond in universe)
-            }
-        if 'maturity_year' not in st.session_state.active_filters.get('range_filters', {}):
-            st.session_state.active_filters['range_filters']['maturity_year'] = {
-                'min': min(bond.maturity_date.year for bond in universe),
-                'max': max(bond.maturity_date.year for bond in universe)
-            }
+    ensure_active_filters(facets)
     
     # Initialize session state
     if 'selected_predefined_filter' not in st.session_state:
@@ -103,33 +166,6 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
     # Predefined filters section
     st.write("Predefined Filters")
     predefined = filter_manager.get_predefined_filters()
-    predefined_options = {"None": "No filter"} | predefined
-    
-    # Handle save/delete/update operations before creating the selectbox
-    if 'save_filter_clicked' in st.session_state and st.session_state.save_filter_clicked:
-        filter_name = st.session_state.get('filter_name', '')
-        filter_desc = st.session_state.get('filter_desc', '')
-        if filter_manager.save_filter(filter_name, filter_desc, st.session_state.active_filters):
-            st.session_state.show_success_message = f"Filter '{filter_name}' saved successfully"
-            st.session_state.selected_predefined_filter = filter_name
-        st.session_state.save_filter_clicked = False
-        st.rerun()
-    
-    if 'delete_filter_clicked' in st.session_state and st.session_state.delete_filter_clicked:
-        filter_to_delete = st.session_state.selected_predefined_filter
-        if filter_manager.delete_filter(filter_to_delete):
-            st.session_state.show_success_message = f"Filter '{filter_to_delete}' deleted"
-            st.session_state.selected_predefined_filter = "None"
-            st.session_state.filter_loaded = False
-        st.session_state.delete_filter_clicked = False
-        st.rerun()
-    
-    if 'update_filter_clicked' in st.session_state and st.session_state.update_filter_clicked:
-        filter_to_update = st.session_state.selected_predefined_filter
-        if filter_manager.update_filter(filter_to_update, st.session_state.active_filters):
-            st.session_state.show_success_message = f"Filter '{filter_to_update}' updated successfully"
-        st.session_state.update_filter_clicked = False
-        st.rerun()
     
     # Show success message if exists
     if st.session_state.show_success_message:
@@ -139,8 +175,8 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
     # Create the filter selection dropdown
     selected_filter = st.selectbox(
         "Select Filter",
-        options=list(predefined_options.keys()),
-        format_func=lambda x: f"{x}: {predefined_options[x]}" if x in predefined else x,
+        options=["None", *predefined],
+        format_func=lambda x: f"{x}: {predefined[x]}" if x in predefined else x,
         key="selected_predefined_filter"
     )
     
@@ -148,18 +184,23 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
     if selected_filter != "None":
         # Only load filter if it's newly selected
         if not st.session_state.filter_loaded or st.session_state.selected_predefined_filter != selected_filter:
-            filter_config = filter_manager._predefined_filters[selected_filter]['filters']
+            # Work on a copy, the UI edits the active filters in place
+            filter_config = filter_manager.get_predefined_filter_config(selected_filter)
             
-            # Add IDs to groups and conditions if they don't exist
-            for group in filter_config['exclusion_groups']:
-                if 'id' not in group:
-                    group['id'] = str(uuid.uuid4())
-                for condition in group['conditions']:
-                    if 'id' not in condition:
-                        condition['id'] = str(uuid.uuid4())
-            
-            st.session_state.active_filters = filter_config
-            st.session_state.filter_loaded = True
+            # The filter may have been deleted by another session since the list was drawn
+            if filter_config is not None:
+                # Add IDs to groups and conditions if they don't exist
+                for group in filter_config['exclusion_groups']:
+                    if 'id' not in group:
+                        group['id'] = new_filter_id()
+                    for condition in group['conditions']:
+                        if 'id' not in condition:
+                            condition['id'] = new_filter_id()
+                
+                st.session_state.active_filters = filter_config
+                st.session_state.filter_loaded = True
+                # Filters saved before a range field existed get it spanning the universe
+                ensure_active_filters(facets)
     
     # Custom filters section
     with st.expander("Custom Filters", expanded=True):
@@ -167,13 +208,9 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
         if selected_filter != "None":
             col1, col2, col3 = st.columns(3)
             with col1:
-                if st.button("🗑️ Delete Filter"):
-                    st.session_state.delete_filter_clicked = True
-                    st.rerun()
+                st.button("🗑️ Delete Filter", on_click=on_delete_filter, args=(filter_manager,))
             with col2:
-                if st.button("📝 Update Filter"):
-                    st.session_state.update_filter_clicked = True
-                    st.rerun()
+                st.button("📝 Update Filter", on_click=on_update_filter, args=(filter_manager,))
         else:
             # Save filter form
             st.write("Save Current Filter")
@@ -183,27 +220,25 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
             with col2:
                 filter_desc = st.text_input("Description", placeholder="e.g., High grade technology sector bonds", key="filter_desc")
             
-            if st.button("💾 Save Filter"):
-                if not filter_name or not filter_desc:
-                    st.error("Please provide both name and description")
-                elif filter_name in filter_manager.get_predefined_filters():
-                    st.error(f"Filter name '{filter_name}' already exists")
-                else:
-                    st.session_state.save_filter_clicked = True
-                    st.rerun()
+            st.button("💾 Save Filter", on_click=on_save_filter, args=(filter_manager,))
+            if st.session_state.get('save_filter_error'):
+                st.error(st.session_state.save_filter_error)
+                st.session_state.save_filter_error = None
         
         st.markdown("---")
         
         col1, col2 = st.columns(2)
         
-        with col1:
+        with col1, st.form("range_filters_form", border=False):
+            # Sliders only rerun the app and refilter when the form is submitted
             st.write("Range Filters")
+            # Every range field is set when the active filters are initialized above
+            range_filters = st.session_state.active_filters['range_filters']
             
             # YTM filter
             st.write("Yield")
-            ytm_min = min(bond.ytm for bond in universe)
-            ytm_max = max(bond.ytm for bond in universe)
-            current_ytm = st.session_state.active_filters.get('range_filters', {}).get('ytm', {})
+            ytm_min, ytm_max = facets['ytm']
+            current_ytm = range_filters['ytm']
             ytm_range = st.slider(
                 "",
                 min_value=float(ytm_min * 100),
@@ -214,15 +249,13 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
                 ),
                 step=0.1,
                 format="%.1f%%",
-                key="ytm_range",
-                on_change=on_ytm_change
+                key="ytm_range"
             )
             
             # Duration filter
             st.write("Duration")
-            dur_min = min(bond.modified_duration for bond in universe)
-            dur_max = max(bond.modified_duration for bond in universe)
-            current_dur = st.session_state.active_filters.get('range_filters', {}).get('modified_duration', {})
+            dur_min, dur_max = facets['modified_duration']
+            current_dur = range_filters['modified_duration']
             dur_range = st.slider(
                 "",
                 min_value=float(dur_min),
@@ -233,15 +266,13 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
                 ),
                 step=0.1,
                 format="%.1f",
-                key="duration_range",
-                on_change=on_duration_change
+                key="duration_range"
             )
 
             # Maturity filter
             st.write("Maturity Year")
-            mat_min = min(bond.maturity_date.year for bond in universe)
-            mat_max = max(bond.maturity_date.year for bond in universe)
-            current_mat = st.session_state.active_filters.get('range_filters', {}).get('maturity_year', {})
+            mat_min, mat_max = facets['maturity_year']
+            current_mat = range_filters['maturity_year']
             mat_range = st.slider(
                 "",
                 min_value=int(mat_min),
@@ -252,17 +283,18 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
                 ),
                 step=1,
                 format="%d",
-                key="maturity_range",
-                on_change=on_maturity_change
+                key="maturity_range"
             )
             
+            st.form_submit_button("Apply Range Filters", on_click=on_range_filters_submit)
+            
         with col2:
             st.write("Exclusion Rules")
             
             # Add new group button
             if st.button("+ Add Exclusion Group"):
                 st.session_state.active_filters['exclusion_groups'].append({
-                    'id': str(uuid.uuid4()),
+                    'id': new_filter_id(),
                     'conditions': []
                 })
             
@@ -279,7 +311,7 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
                             default_category = group['conditions'][0].get('category', 'sector')
                         
                         group['conditions'].append({
-                            'id': str(uuid.uuid4()),
+                            'id': new_filter_id(),
                             'category': default_category,
                             'value': None
                         })
@@ -292,9 +324,9 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
                             current_category = condition.get('category', 'sector')
                             new_category = st.selectbox(
                                 "Category",
-                                options=['sector', 'payment_rank', 'rating', 'issuer', 'country'],
+                                options=CONDITION_CATEGORIES,
                                 key=f"cat_{condition['id']}",
-                                index=(['sector', 'payment_rank', 'rating', 'issuer', 'country'].index(current_category))
+                                index=CONDITION_CATEGORY_INDEX[current_category]
                             )
                             if new_category != current_category:
                                 condition['category'] = new_category
@@ -302,10 +334,7 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
                         
                         with col2:
                             # Get available values for the selected category
-                            if new_category == 'rating':
-                                values = sorted(list(set(bond.credit_rating.display() for bond in universe)))
-                            else:
-                                values = sorted(list(set(getattr(bond, new_category, 'Unknown') for bond in universe)))
+                            values = facets['values'][new_category]
                             
                             current_value = condition.get('value')
                             try:
@@ -342,8 +371,23 @@ def render_filter_controls(universe: List[Bond], filter_manager: FilterManager)
                     
                     st.markdown("---")
     
-    # Apply filters
-    filtered_universe = filter_manager.apply_filter(universe, st.session_state.active_filters)
+    # Apply filters, reusing earlier results for filter configurations already applied to this universe
+    cached = st.session_state.get('filtered_universe_cache')
+    if cached is None or cached[0] is not universe:
+        cached = (universe, {})
+        st.session_state.filtered_universe_cache = cached
+    
+    filter_key = filter_cache_key(st.session_state.active_filters)
+    filtered_universe = cached[1].get(filter_key)
+    if filtered_universe is None and filters_keep_universe(st.session_state.active_filters, facets):
+        # Nothing to filter out, e.g. on the first render or with no filter selected
+        filtered_universe = universe
+    elif filtered_universe is None:
+        filtered_universe = filter_manager.apply_filter(universe, st.session_state.active_filters, table)
+        # Drop the oldest result once the cache is full
+        if len(cached[1]) >= MAX_CACHED_FILTER_RESULTS:
+            del cached[1][next(iter(cached[1]))]
+        cached[1][filter_key] = filtered_universe
     
     # Show filter stats
     st.info(f"Remaining {len(filtered_universe)} of {len(universe)} bonds", icon="ℹ️")
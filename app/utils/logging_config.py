@@ -1,48 +1,48 @@
 import logging
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 import os
 from datetime import datetime
 
+# Streamlit reruns the app script on every interaction, but this module is imported once,
+# so the handlers it set up are remembered here and reused
+_handlers = []
+
 def setup_logging():
     """Configure logging for the application"""
+    # Get the root logger
+    logger = logging.getLogger()
+
+    # Already configured by an earlier run of the script
+    if _handlers and all(handler in logger.handlers for handler in _handlers):
+        return logger
+
     # Create logs directory if it doesn't exist
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
-    
-    # Use a fixed log file name
+
+    # Use a fixed log file name, rotated so it does not grow without bound
     log_file = log_dir / "bondalloc.log"
-    
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            # Use mode='a' to append to the log file instead of overwriting
-            logging.FileHandler(log_file, mode='a'),
-            logging.StreamHandler()  # Also print to console
-        ]
-    )
-    
-    # Get the root logger
-    logger = logging.getLogger()
-    
-    # Remove any existing handlers to avoid duplicates
+
+    # Remove any existing handlers to avoid duplicates, closing them so their files are released
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
-    
+        handler.close()
+
     # Add our handlers
-    file_handler = logging.FileHandler(log_file, mode='a')
-    console_handler = logging.StreamHandler()
-    
+    file_handler = RotatingFileHandler(log_file, mode='a', maxBytes=10_000_000, backupCount=5, encoding='utf-8')
+    console_handler = logging.StreamHandler()  # Also print to console
+
     # Create formatter
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
-    
+
     logger.addHandler(file_handler)
     logger.addHandler(console_handler)
-    
+    _handlers[:] = [file_handler, console_handler]
+
     # Set level for root logger
     logger.setLevel(logging.INFO)
-    
+
     return logger